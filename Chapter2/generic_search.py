@@ -16,8 +16,9 @@
 
 from __future__ import annotations
 from typing import TypeVar, Iterable, Sequence, Generic, List, Callable, Set, Deque, Dict, Any, Optional
-from typing import Protocol, Tuple
+from typing import Protocol, Tuple, Iterator
 from heapq import heappush, heappop
+from math import inf
 
 T = TypeVar('T')
 
@@ -170,6 +171,71 @@ def bfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], Li
     return None, None  # went through everything and never found goal
 
 
+# The path from initial to goal through meeting, as a chain of Nodes ending at
+# goal: before maps each state to the previous one on the way from initial,
+# after to the next one on the way to goal. With a cost function the Nodes
+# get the costs along the path.
+def _joined_path(meeting: T, before: Dict[T, Optional[T]], after: Dict[T, Optional[T]],
+                 cost: Optional[Callable[[T, T], float]] = None) -> Node[T]:
+    states: List[T] = []
+    state: Optional[T] = meeting
+    while state is not None:
+        states.append(state)
+        state = before[state]
+    states.reverse()
+    state = after[meeting]
+    while state is not None:
+        states.append(state)
+        state = after[state]
+    node: Node[T] = Node(states[0], None)
+    for state in states[1:]:
+        node = Node(state, node, 0.0 if cost is None else node.cost + cost(node.state, state))
+    return node
+
+
+# BFS from both ends at once, a whole layer at a time from the side with the
+# smaller layer, until the two meet. predecessors(state) lists the states
+# with an edge into state; for undirected spaces it is successors. The
+# counter counts the states expanded on both sides. On an infinite space the
+# search only ends if there is a path.
+def bidirectional_bfs(initial: T, goal: T, successors: Callable[[T], List[T]],
+                      predecessors: Optional[Callable[[T], List[T]]] = None) -> Tuple[Optional[Node[T]], Optional[int]]:
+    if initial == goal:
+        return Node(initial, None), 1
+    if predecessors is None:
+        predecessors = successors
+    # the previous state of each state reached from initial, and the next
+    # state of each state reached from goal
+    before: Dict[T, Optional[T]] = {initial: None}
+    after: Dict[T, Optional[T]] = {goal: None}
+    forward_layer: List[T] = [initial]
+    backward_layer: List[T] = [goal]
+
+    counter: int = 0
+    while forward_layer and backward_layer:
+        forward: bool = len(forward_layer) <= len(backward_layer)
+        layer: List[T] = forward_layer if forward else backward_layer
+        expand: Callable[[T], List[T]] = successors if forward else predecessors
+        reached: Dict[T, Optional[T]] = before if forward else after
+        other: Dict[T, Optional[T]] = after if forward else before
+        next_layer: List[T] = []
+        for state in layer:
+            counter += 1
+            for child in expand(state):
+                if child in reached:
+                    continue
+                reached[child] = state
+                # the first meeting is a shortest path, since layers are expanded whole
+                if child in other:
+                    return _joined_path(child, before, after), counter
+                next_layer.append(child)
+        if forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+    return None, None  # one side ran out of states without meeting the other
+
+
 class PriorityQueue(Generic[T]):
     def __init__(self) -> None:
         self._container: List[T] = []
@@ -188,25 +254,35 @@ class PriorityQueue(Generic[T]):
         return repr(self._container)
 
 
-def astar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]], heuristic: Callable[[T], float]) -> Tuple[Optional[Node[T]], Optional[int]]:
+def unit_cost(parent: T, child: T) -> float:
+    return 1.0
+
+
+# cost(parent, child) is the cost of the step from parent to child; the
+# default of 1 per step suits grids. The counter only counts expansions: an
+# entry whose state has since been reached more cheaply is stale and skipped.
+def astar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]], heuristic: Callable[[T], float],
+          cost: Callable[[T, T], float] = unit_cost) -> Tuple[Optional[Node[T]], Optional[int]]:
     # frontier is where we've yet to go
     frontier: PriorityQueue[Node[T]] = PriorityQueue()
     frontier.push(Node(initial, None, 0.0, heuristic(initial)))
-    # explored is where we've been
+    # explored is where we've been, at the lowest cost found so far
     explored: Dict[T, float] = {initial: 0.0}
 
     # keep going while there is more to explore
     counter: int = 0
     while not frontier.empty:
-        counter += 1
         current_node: Node[T] = frontier.pop()
         current_state: T = current_node.state
+        if current_node.cost > explored[current_state]:  # stale entry, a cheaper one was pushed later
+            continue
+        counter += 1
         # if we found the goal, we're done
         if goal_test(current_state):
             return current_node, counter
         # check where we can go next and haven't explored
         for child in successors(current_state):
-            new_cost: float = current_node.cost + 1  # 1 assumes a grid, need a cost function for more sophisticated apps
+            new_cost: float = current_node.cost + cost(current_state, child)
 
             if child not in explored or explored[child] > new_cost:
                 explored[child] = new_cost
@@ -214,6 +290,136 @@ def astar(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T],
     return None, None  # went through everything and never found goal
 
 
+# A* from both ends at once, taking turns. heuristic estimates the cost to
+# goal and reverse_heuristic the cost from initial; both must be admissible.
+# Whenever a state is reached from both sides, the path through it is a
+# candidate, and the search stops once the lowest f on either side is no
+# better than the best candidate, as no path left can beat it. On an
+# infinite space the search only ends if there is a path.
+def bidirectional_astar(initial: T, goal: T, successors: Callable[[T], List[T]], heuristic: Callable[[T], float],
+                        reverse_heuristic: Callable[[T], float],
+                        predecessors: Optional[Callable[[T], List[T]]] = None,
+                        cost: Callable[[T, T], float] = unit_cost) -> Tuple[Optional[Node[T]], Optional[int]]:
+    if predecessors is None:
+        predecessors = successors
+    # index 0 is the search from initial, index 1 the one from goal
+    expands: Tuple[Callable[[T], List[T]], Callable[[T], List[T]]] = (successors, predecessors)
+    heuristics: Tuple[Callable[[T], float], Callable[[T], float]] = (heuristic, reverse_heuristic)
+    explored: Tuple[Dict[T, float], Dict[T, float]] = ({initial: 0.0}, {goal: 0.0})
+    # the previous state of each state reached from initial, and the next
+    # state of each state reached from goal
+    parents: Tuple[Dict[T, Optional[T]], Dict[T, Optional[T]]] = ({initial: None}, {goal: None})
+    frontiers: Tuple[PriorityQueue[Node[T]], PriorityQueue[Node[T]]] = (PriorityQueue(), PriorityQueue())
+    frontiers[0].push(Node(initial, None, 0.0, heuristic(initial)))
+    frontiers[1].push(Node(goal, None, 0.0, reverse_heuristic(goal)))
+    best: float = 0.0 if initial == goal else inf
+    meeting: Optional[T] = initial if initial == goal else None
+
+    counter: int = 0
+    side: int = 1
+    while not frontiers[0].empty and not frontiers[1].empty:
+        side = 1 - side
+        current_node: Node[T] = frontiers[side].pop()
+        current_state: T = current_node.state
+        if current_node.cost > explored[side][current_state]:  # stale entry
+            side = 1 - side  # let this side pop again
+            continue
+        if current_node.cost + current_node.heuristic >= best:
+            break
+        counter += 1
+        for child in expands[side](current_state):
+            step: float = cost(current_state, child) if side == 0 else cost(child, current_state)
+            new_cost: float = current_node.cost + step
+            if child not in explored[side] or explored[side][child] > new_cost:
+                explored[side][child] = new_cost
+                parents[side][child] = current_state
+                frontiers[side].push(Node(child, None, new_cost, heuristics[side](child)))
+                if child in explored[1 - side] and new_cost + explored[1 - side][child] < best:
+                    best = new_cost + explored[1 - side][child]
+                    meeting = child
+    if meeting is None:
+        return None, None
+    return _joined_path(meeting, parents[0], parents[1], cost), counter
+
+
+# One depth-first pass of IDA*: every path from initial whose f = cost +
+# heuristic stays within bound, skipping states already on the path. Only the
+# current path and the successors left to try along it are kept, so memory
+# grows with the depth of the search, not with the states it visits.
+# Returns the goal Node if found, the lowest f that exceeded bound (the
+# bound of the next pass, inf if nothing was cut off) and the expansions.
+def _bounded_dfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]],
+                 heuristic: Callable[[T], float], cost: Callable[[T, T], float],
+                 bound: float) -> Tuple[Optional[Node[T]], float, int]:
+    first: float = heuristic(initial)
+    if first > bound:
+        return None, first, 0
+    path: List[T] = [initial]
+    costs: List[float] = [0.0]
+    on_path: Set[T] = {initial}
+    pending: List[Iterator[T]] = []
+    next_bound: float = inf
+    counter: int = 1
+    if goal_test(initial):
+        return Node(initial, None), next_bound, counter
+    pending.append(iter(successors(initial)))
+    while pending:
+        for child in pending[-1]:
+            if child in on_path:
+                continue
+            new_cost: float = costs[-1] + cost(path[-1], child)
+            f: float = new_cost + heuristic(child)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            counter += 1
+            path.append(child)
+            costs.append(new_cost)
+            on_path.add(child)
+            if goal_test(child):
+                node: Optional[Node[T]] = None
+                for state, state_cost in zip(path, costs):
+                    node = Node(state, node, state_cost)
+                return node, next_bound, counter
+            pending.append(iter(successors(child)))
+            break
+        else:  # every successor tried, so step back
+            pending.pop()
+            on_path.discard(path.pop())
+            costs.pop()
+    return None, next_bound, counter
+
+
+# Iterative deepening A*: bounded depth-first passes, each with the bound
+# raised to the lowest f that went over the previous one. With an admissible
+# heuristic the first goal found is optimal. Memory is linear in the depth
+# of the solution, at the price of expanding shallow states again on every
+# pass; the counter counts every expansion of every pass.
+def ida_star(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]],
+             heuristic: Callable[[T], float], cost: Callable[[T, T], float] = unit_cost,
+             max_cost: float = inf) -> Tuple[Optional[Node[T]], Optional[int]]:
+    bound: float = heuristic(initial)
+    counter: int = 0
+    while bound <= max_cost:
+        node, bound, expanded = _bounded_dfs(initial, goal_test, successors, heuristic, cost, bound)
+        counter += expanded
+        if node is not None:
+            return node, counter
+    return None, None  # nothing was cut off, or only paths costing more than max_cost
+
+
+def no_heuristic(state: T) -> float:
+    return 0.0
+
+
+# Iterative deepening DFS: depth-first passes to depth 0, 1, 2 and so on, so
+# the first goal found is as shallow as with bfs while memory stays linear
+# in its depth. Gives up past max_depth steps.
+def iddfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]],
+          max_depth: float = inf) -> Tuple[Optional[Node[T]], Optional[int]]:
+    return ida_star(initial, goal_test, successors, no_heuristic, unit_cost, max_depth)
+
+
 if __name__ == "__main__":
     import random
     import time
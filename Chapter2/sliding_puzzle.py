@@ -0,0 +1,113 @@
+# sliding_puzzle.py
+# From Classic Computer Science Problems in Python Chapter 2
+# Copyright 2018 David Kopec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import random
+import time
+import tracemalloc
+from generic_search import astar, ida_star, iddfs, bfs, node_to_path, Node
+
+# The tiles of a square sliding puzzle row by row, with 0 for the blank
+Board = Tuple[int, ...]
+
+
+def solved_board(size: int) -> Board:
+    return tuple(range(1, size * size)) + (0,)
+
+
+def board_successors(size: int) -> Callable[[Board], List[Board]]:
+    def successors(board: Board) -> List[Board]:
+        blank: int = board.index(0)
+        row, column = divmod(blank, size)
+        boards: List[Board] = []
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            if 0 <= row + dr < size and 0 <= column + dc < size:
+                tile: int = (row + dr) * size + column + dc
+                cells: List[int] = list(board)
+                cells[blank], cells[tile] = cells[tile], 0
+                boards.append(tuple(cells))
+        return boards
+    return successors
+
+
+# How far every tile is from its place, ignoring the others
+def manhattan_distance(size: int) -> Callable[[Board], float]:
+    def distance(board: Board) -> float:
+        total: int = 0
+        for position, tile in enumerate(board):
+            if tile:
+                goal_row, goal_column = divmod(tile - 1, size)
+                row, column = divmod(position, size)
+                total += abs(row - goal_row) + abs(column - goal_column)
+        return total
+    return distance
+
+
+# The solved board after moves random slides, never undoing the previous one
+def scramble(size: int, moves: int, rng: random.Random) -> Board:
+    successors: Callable[[Board], List[Board]] = board_successors(size)
+    board: Board = solved_board(size)
+    previous: Optional[Board] = None
+    for _ in range(moves):
+        board, previous = rng.choice([b for b in successors(board) if b != previous]), board
+    return board
+
+
+class SearchMeasure(NamedTuple):
+    moves: Optional[int]  # length of the solution found
+    expansions: Optional[int]
+    peak_bytes: int  # most memory allocated at once during the search
+    seconds: float  # with tracemalloc on, so slower than a plain run
+
+
+def measure(search: Callable[[], Tuple[Optional[Node[Board]], Optional[int]]]) -> SearchMeasure:
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    node, counter = search()
+    seconds: float = time.perf_counter() - start
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return SearchMeasure(None if node is None else len(node_to_path(node)) - 1, counter, peak, seconds)
+
+
+# Peak memory of astar against ida_star on scrambled boards
+def benchmark(size: int = 4, moves: int = 50, boards: int = 3, seed: int = 0) -> List[Tuple[SearchMeasure, SearchMeasure]]:
+    rng: random.Random = random.Random(seed)
+    goal: Board = solved_board(size)
+    successors: Callable[[Board], List[Board]] = board_successors(size)
+    heuristic: Callable[[Board], float] = manhattan_distance(size)
+    results: List[Tuple[SearchMeasure, SearchMeasure]] = []
+    for _ in range(boards):
+        board: Board = scramble(size, moves, rng)
+        results.append((measure(lambda: astar(board, goal.__eq__, successors, heuristic)),
+                        measure(lambda: ida_star(board, goal.__eq__, successors, heuristic))))
+    return results
+
+
+if __name__ == "__main__":
+    board: Board = scramble(3, 20, random.Random(1))
+    goal: Board = solved_board(3)
+    for name, search in [("BFS", lambda: bfs(board, goal.__eq__, board_successors(3))),
+                         ("IDDFS", lambda: iddfs(board, goal.__eq__, board_successors(3)))]:
+        result: SearchMeasure = measure(search)
+        print(f"8-puzzle {name}: {result.moves} moves, {result.expansions} expansions, "
+              f"peak {result.peak_bytes / 1024:.0f} KiB")
+    for astar_result, ida_result in benchmark():
+        print(f"15-puzzle in {astar_result.moves} moves: "
+              f"A* peak {astar_result.peak_bytes / 1024:.0f} KiB ({astar_result.expansions} expansions, "
+              f"{astar_result.seconds:.2f} s), "
+              f"IDA* peak {ida_result.peak_bytes / 1024:.0f} KiB ({ida_result.expansions} expansions, "
+              f"{ida_result.seconds:.2f} s)")
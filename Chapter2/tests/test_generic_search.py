@@ -18,6 +18,7 @@ import math
 import random
 import time
 import unittest
+from typing import List
 
 import generic_search
 
@@ -117,6 +118,81 @@ class AStarTestCase(unittest.TestCase):
             generic_search.astar(1, lambda x: x == 5, lambda x: [(x + 1) % 5, (x + 2) % 5, (x + 3) % 5, (x + 4) % 5], lambda x: 0)[0],
             None)
 
+    def test_astar_with_costs(self) -> None:
+        # the direct road is longer than the detour through b and c
+        roads = {"a": {"b": 1.0, "d": 10.0}, "b": {"a": 1.0, "c": 2.0}, "c": {"b": 2.0, "d": 3.0},
+                 "d": {"a": 10.0, "c": 3.0, "e": 20.0}, "e": {"d": 20.0}}
+        node, counter = generic_search.astar("a", lambda x: x == "e", lambda x: list(roads[x]), lambda x: 0.0,
+                                             lambda parent, child: roads[parent][child])
+        self.assertEqual(generic_search.node_to_path(node), ["a", "b", "c", "d", "e"])
+        self.assertEqual(node.cost, 26.0)
+        # d is pushed at cost 10 before it is reached at 6, but expanded once
+        self.assertEqual(counter, 5)
+        node, _ = generic_search.astar("a", lambda x: x == "d", lambda x: list(roads[x]), lambda x: 0.0)
+        self.assertEqual(generic_search.node_to_path(node), ["a", "d"])
+
+
+# a directed space over 1..200: one up or twice as much
+def doubling(x: int) -> List[int]:
+    return [y for y in (x + 1, x * 2) if y <= 200]
+
+
+def halving(x: int) -> List[int]:
+    return [y for y in (x - 1, x // 2 if x % 2 == 0 else 0) if y >= 1]
+
+
+def ring(x: int) -> List[int]:
+    return [(x + 1) % 1000, (x - 1) % 1000]
+
+
+class IterativeDeepeningTestCase(unittest.TestCase):
+    def test_iddfs(self) -> None:
+        node, counter = generic_search.iddfs(1, lambda x: x == 100, doubling)
+        self.assertEqual(len(generic_search.node_to_path(node)),
+                         len(generic_search.node_to_path(generic_search.bfs(1, lambda x: x == 100, doubling)[0])))
+        self.assertEqual(generic_search.iddfs(100, lambda x: x == 1, doubling), (None, None))
+        self.assertEqual(generic_search.iddfs(1, lambda x: x == 100, doubling, max_depth=3), (None, None))
+
+    def test_ida_star(self) -> None:
+        roads = {"a": {"b": 1.0, "d": 10.0}, "b": {"a": 1.0, "c": 2.0}, "c": {"b": 2.0, "d": 3.0},
+                 "d": {"a": 10.0, "c": 3.0, "e": 20.0}, "e": {"d": 20.0}}
+        node, _ = generic_search.ida_star("a", lambda x: x == "e", lambda x: list(roads[x]), lambda x: 0.0,
+                                          lambda parent, child: roads[parent][child])
+        self.assertEqual(generic_search.node_to_path(node), ["a", "b", "c", "d", "e"])
+        self.assertEqual(node.cost, 26.0)
+        self.assertEqual(generic_search.ida_star(1, lambda x: x == 0, ring, lambda x: 0.0, max_cost=10), (None, None))
+
+
+class BidirectionalTestCase(unittest.TestCase):
+    def test_bidirectional_bfs(self) -> None:
+        node, counter = generic_search.bidirectional_bfs(1, 100, doubling, halving)
+        path = generic_search.node_to_path(node)
+        self.assertEqual((path[0], path[-1]), (1, 100))
+        self.assertTrue(all(b in doubling(a) for a, b in zip(path, path[1:])))
+        self.assertEqual(len(path), len(generic_search.node_to_path(
+            generic_search.bfs(1, lambda x: x == 100, doubling)[0])))
+        self.assertEqual(generic_search.bidirectional_bfs(7, 7, doubling, halving)[0].state, 7)
+        # every step goes up, so there is no way back down to 1
+        self.assertEqual(generic_search.bidirectional_bfs(100, 1, doubling, halving), (None, None))
+
+    def test_bidirectional_bfs_undirected(self) -> None:
+        node, counter = generic_search.bidirectional_bfs(0, 500, ring)
+        self.assertEqual(len(generic_search.node_to_path(node)), 501)
+        self.assertLess(counter, generic_search.bfs(0, lambda x: x == 500, ring)[1])
+
+    def test_bidirectional_astar(self) -> None:
+        roads = {"a": {"b": 1.0, "d": 10.0}, "b": {"a": 1.0, "c": 2.0}, "c": {"b": 2.0, "d": 3.0},
+                 "d": {"a": 10.0, "c": 3.0, "e": 20.0}, "e": {"d": 20.0}}
+        node, _ = generic_search.bidirectional_astar("a", "e", lambda x: list(roads[x]), lambda x: 0.0, lambda x: 0.0,
+                                                     cost=lambda parent, child: roads[parent][child])
+        self.assertEqual(generic_search.node_to_path(node), ["a", "b", "c", "d", "e"])
+        self.assertEqual(node.cost, 26.0)
+        node, _ = generic_search.bidirectional_astar(1, 100, doubling, lambda x: 0.0, lambda x: 0.0, halving)
+        self.assertEqual(node.cost, len(generic_search.node_to_path(
+            generic_search.bfs(1, lambda x: x == 100, doubling)[0])) - 1)
+        self.assertEqual(generic_search.bidirectional_astar(100, 1, doubling, lambda x: 0.0, lambda x: 0.0, halving),
+                         (None, None))
+
         
 if __name__ == '__main__':
     unittest.main()
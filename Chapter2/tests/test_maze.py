@@ -15,10 +15,12 @@
 # limitations under the License.
 
 import math
+import random
 import unittest
 
 from typing import Callable
 import maze
+from generic_search import bfs, astar, bidirectional_bfs, bidirectional_astar, node_to_path
 
 
 class MazeTestCase(unittest.TestCase):
@@ -43,5 +45,24 @@ class MazeTestCase(unittest.TestCase):
         self.assertEqual(distance(maze.MazeLocation(0, 0)), math.sqrt(2**2 + 2**2))
 
 
+class BidirectionalMazeTestCase(unittest.TestCase):
+    def test_same_path_lengths(self) -> None:
+        random.seed(0)
+        for _ in range(20):
+            m = maze.Maze(rows=30, columns=30, sparseness=0.25, start=maze.MazeLocation(0, 0),
+                          goal=maze.MazeLocation(29, 29))
+            node = bfs(m.start, m.goal_test, m.successors)[0]
+            if node is None:
+                self.assertEqual(bidirectional_bfs(m.start, m.goal, m.successors), (None, None))
+                continue
+            self.assertEqual(len(node_to_path(bidirectional_bfs(m.start, m.goal, m.successors)[0])),
+                             len(node_to_path(node)))
+            node = astar(m.start, m.goal_test, m.successors, maze.manhattan_distance(m.goal))[0]
+            path = node_to_path(bidirectional_astar(m.start, m.goal, m.successors, maze.manhattan_distance(m.goal),
+                                                    maze.manhattan_distance(m.start))[0])
+            self.assertEqual(len(path), len(node_to_path(node)))
+            self.assertEqual((path[0], path[-1]), (m.start, m.goal))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,56 @@
+# test_sliding_puzzle.py
+# unit test of sliding_puzzle.py
+# Copyright 2023 Kyungwon Chun
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import unittest
+
+import sliding_puzzle
+from generic_search import astar, bfs, ida_star, iddfs, node_to_path
+
+
+class SlidingPuzzleTestCase(unittest.TestCase):
+    def test_successors(self) -> None:
+        successors = sliding_puzzle.board_successors(3)
+        self.assertEqual(len(successors(sliding_puzzle.solved_board(3))), 2)
+        self.assertEqual(len(successors((1, 2, 3, 4, 0, 5, 6, 7, 8))), 4)
+
+    def test_manhattan_distance(self) -> None:
+        distance = sliding_puzzle.manhattan_distance(3)
+        self.assertEqual(distance(sliding_puzzle.solved_board(3)), 0)
+        self.assertEqual(distance((0, 1, 2, 3, 4, 5, 6, 7, 8)), 12)
+
+    def test_searches_agree(self) -> None:
+        rng = random.Random(0)
+        goal = sliding_puzzle.solved_board(3)
+        successors = sliding_puzzle.board_successors(3)
+        heuristic = sliding_puzzle.manhattan_distance(3)
+        for _ in range(5):
+            board = sliding_puzzle.scramble(3, 14, rng)
+            length = len(node_to_path(bfs(board, goal.__eq__, successors)[0]))
+            self.assertEqual(len(node_to_path(astar(board, goal.__eq__, successors, heuristic)[0])), length)
+            path = node_to_path(ida_star(board, goal.__eq__, successors, heuristic)[0])
+            self.assertEqual(len(path), length)
+            self.assertEqual((path[0], path[-1]), (board, goal))
+            self.assertEqual(len(node_to_path(iddfs(board, goal.__eq__, successors)[0])), length)
+
+    def test_benchmark(self) -> None:
+        (astar_result, ida_result), = sliding_puzzle.benchmark(size=3, moves=20, boards=1)
+        self.assertEqual(astar_result.moves, ida_result.moves)
+        self.assertLess(ida_result.peak_bytes, astar_result.peak_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
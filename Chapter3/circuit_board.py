@@ -16,7 +16,7 @@
 
 import random
 
-from typing import NamedTuple, List, Dict, Optional
+from typing import NamedTuple, List, Dict, Optional, Set, Tuple
 from random import choice
 from string import ascii_uppercase
 from csp import CSP, Constraint
@@ -61,6 +61,90 @@ def generate_domain(chip: Chip, grid: Grid) -> List[List[GridLocation]]:
     return domain
 
 
+# A placement as a bitmask over the board, bit row * columns + column set for
+# every covered cell, so two placements overlap exactly when their AND is nonzero
+def generate_mask_domain(chip: Chip, rows: int, columns: int) -> List[int]:
+    stripe: int = (1 << chip.width) - 1
+    shape: int = 0
+    for r in range(chip.height):
+        shape |= stripe << (r * columns)
+    return [shape << (row * columns + col)
+            for row in range(rows - chip.height + 1)
+            for col in range(columns - chip.width + 1)]
+
+
+def mask_locations(mask: int, columns: int) -> List[GridLocation]:
+    locations: List[GridLocation] = []
+    while mask:
+        low: int = mask & -mask
+        row, col = divmod(low.bit_length() - 1, columns)
+        locations.append(GridLocation(row, col))
+        mask ^= low
+    return locations
+
+
+class ChipMaskConstraint(Constraint[Chip, int]):
+    def __init__(self, chips: List[Chip]) -> None:
+        super().__init__(chips)
+        self.chips: List[Chip] = chips
+
+    def satisfied(self, assignment: Dict[Chip, int]) -> bool:
+        occupied: int = 0
+        for mask in assignment.values():
+            if occupied & mask:
+                return False
+            occupied |= mask
+        return True
+
+    def satisfied_incremental(self, assignment: Dict[Chip, int], last_variable: Chip, last_value: int) -> bool:
+        for chip, mask in assignment.items():
+            if chip != last_variable and mask & last_value:
+                return False
+        return True
+
+    def culprits(self, assignment: Dict[Chip, int], last_variable: Chip, last_value: int) -> Set[Chip]:
+        for chip, mask in assignment.items():
+            if chip != last_variable and mask & last_value:
+                return {chip}
+        return set()
+
+
+# Depth-first layout with forward checking: placing a chip removes every
+# overlapping placement from the chips still to place, the chip with the
+# fewest placements left goes next, and a branch is abandoned as soon as some
+# chip has none left or the free cells can no longer hold the remaining area.
+def layout_chips(chips: List[Chip], rows: int, columns: int) -> Optional[Dict[Chip, int]]:
+    domains: Dict[Chip, List[int]] = {chip: generate_mask_domain(chip, rows, columns) for chip in chips}
+    placed: Dict[Chip, int] = {}
+    if _layout(domains, placed, 0, rows * columns):
+        return placed
+    return None
+
+
+def _layout(domains: Dict[Chip, List[int]], placed: Dict[Chip, int], occupied: int, cells: int) -> bool:
+    if not domains:
+        return True
+    area: int = sum(chip.height * chip.width for chip in domains)
+    if area > cells - occupied.bit_count():
+        return False
+    chip: Chip = min(domains, key=lambda c: (len(domains[c]), -c.height * c.width))
+    candidates: List[int] = domains.pop(chip)
+    for mask in candidates:
+        filtered: List[Tuple[Chip, List[int]]] = []
+        for other, masks in domains.items():
+            remaining: List[int] = [m for m in masks if not m & mask]
+            if not remaining:
+                break
+            filtered.append((other, remaining))
+        else:
+            placed[chip] = mask
+            if _layout(dict(filtered), placed, occupied | mask, cells):
+                return True
+            del placed[chip]
+    domains[chip] = candidates
+    return False
+
+
 class ChipSearchConstraint(Constraint[Chip, List[GridLocation]]):
     def __init__(self, chip: Chip) -> None:
         super().__init__(chip)
@@ -70,25 +154,37 @@ class ChipSearchConstraint(Constraint[Chip, List[GridLocation]]):
         # if there are any duplicates grid locations then there is an overlap
         all_locations = [locs for values in assignment.values() for locs in values]
         return len(set(all_locations)) == len(all_locations)
+
+    def satisfied_incremental(self, assignment: Dict[Chip, List[GridLocation]], last_variable: Chip,
+                              last_value: List[GridLocation]) -> bool:
+        # only the newly placed chip can overlap the chips already placed
+        placed: Set[GridLocation] = set(last_value)
+        for chip, locations in assignment.items():
+            if chip != last_variable and not placed.isdisjoint(locations):
+                return False
+        return True
+
+    def culprits(self, assignment: Dict[Chip, List[GridLocation]], last_variable: Chip,
+                 last_value: List[GridLocation]) -> Set[Chip]:
+        placed: Set[GridLocation] = set(last_value)
+        for chip, locations in assignment.items():
+            if chip != last_variable and not placed.isdisjoint(locations):
+                return {chip}
+        return set()
     
 
 if __name__ == "__main__":
     grid: Grid = generate_grid(9, 9)
     chips: List[Chip] = [Chip(6, 1), Chip(4, 4), Chip(3, 3), Chip(2, 2), Chip(2, 5)]
-    locations: Dict[str, List[List[GridLocation]]] = {}
-    for chip in chips:
-        locations[chip] = generate_domain(chip, grid)
-    csp: CSP[Chip, List[GridLocation]] = CSP(chips, locations)
-    csp.add_constraint(ChipSearchConstraint(chips))
-    solution: Optional[Dict[Chip, List[GridLocation]]] = csp.backtracking_search()
-    
+    solution: Optional[Dict[Chip, int]] = layout_chips(chips, len(grid), len(grid[0]))
+
     markers: str = [*reversed(ascii_uppercase)]
     if solution is None:
         print("No solution found!")
     else:
-        for chip, grid_locations in solution.items():
+        for chip, mask in solution.items():
             marker: str = markers.pop()
-            for grid_location in grid_locations:
+            for grid_location in mask_locations(mask, len(grid[0])):
                 row: int = grid_location.row
                 col: int = grid_location.column
                 grid[row][col] = marker
@@ -14,12 +14,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Generic, TypeVar, Dict, List, Optional
+from __future__ import annotations
+from typing import Generic, TypeVar, Dict, List, Optional, Tuple, Deque, Set, Callable, Iterator, Iterable, Collection, Sequence, NamedTuple
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+from multiprocessing.synchronize import Event
+import multiprocessing
+import os
+import random
+import sys
+import time
 from abc import ABC, abstractmethod
 
 V = TypeVar('V') # variable type
 D = TypeVar('D') # domain type
 
+# How many nodes the search expands between two polls of its stop callback
+STOP_CHECK_INTERVAL: int = 1024
+# How many nogoods a backjumping search remembers before evicting the least recently used
+NOGOOD_CACHE_SIZE: int = 4096
+
 
 # Base class for all constraints
 class Constraint(Generic[V, D], ABC):
@@ -32,15 +48,399 @@ class Constraint(Generic[V, D], ABC):
     def satisfied(self, assignment: Dict[V, D]) -> bool:
         ...
 
+    # Check the constraint right after last_variable was assigned last_value,
+    # given that the rest of the assignment already satisfied it. Subclasses
+    # override this to look only at the pairs involving last_variable.
+    def satisfied_incremental(self, assignment: Dict[V, D], last_variable: V, last_value: D) -> bool:
+        return self.satisfied(assignment)
+
+    # The assigned variables to blame once satisfied_incremental() has
+    # rejected last_value: together with last_variable, their values must
+    # already break the constraint. By default every other assigned variable
+    # is blamed; subclasses can name just one that is actually in conflict,
+    # preferably the first assigned (assignments keep their insertion order),
+    # which lets a backjumping search jump further.
+    def culprits(self, assignment: Dict[V, D], last_variable: V, last_value: D) -> Set[V]:
+        return {v for v in self.variables if v != last_variable and v in assignment}
+
+    # Local search support. conflicts() counts the violations variable would
+    # be part of if it took value, everything else in assignment staying put,
+    # and conflicting() lists the variables whose values conflict with the
+    # current value of variable. By default conflicts() is 0 or 1, found by
+    # trying the value, and conflicting() names every other assigned variable
+    # when it is 1. Constraints over many variables can keep indexes instead,
+    # cleared by reset_conflicts() and updated by moved() each time a variable
+    # gets a new value (old_value is None when it had none), so that both
+    # cost O(1) per conflict. They can also offer preferred_values(), values
+    # likely to be conflict-free that a sampling search tries first.
+    def conflicts(self, assignment: Dict[V, D], variable: V, value: D) -> int:
+        had_value: bool = variable in assignment
+        old_value: Optional[D] = assignment.get(variable)
+        assignment[variable] = value
+        satisfied: bool = self.satisfied_incremental(assignment, variable, value)
+        if had_value:
+            assignment[variable] = old_value
+        else:
+            del assignment[variable]
+        return 0 if satisfied else 1
+
+    def conflicting(self, assignment: Dict[V, D], variable: V) -> Iterable[V]:
+        if self.conflicts(assignment, variable, assignment[variable]):
+            return [v for v in self.variables if v != variable and v in assignment]
+        return []
+
+    def reset_conflicts(self) -> None:
+        pass
+
+    def preferred_values(self, variable: V) -> Sequence[D]:
+        return ()
+
+    def moved(self, assignment: Dict[V, D], variable: V, old_value: Optional[D]) -> None:
+        pass
+
+    # Propagation support: the values in domains[variable] that still have a
+    # support under the domains of all the other variables of the constraint
+    # (generalized arc consistency), or None to let CSP.revise() test pairs
+    # of values with satisfied(), which is all that binary constraints need.
+    def supports(self, domains: Dict[V, List[D]], variable: V) -> Optional[List[D]]:
+        return None
+
+
+# An extensional constraint: the values of its variables, in order, must be
+# one of the allowed tuples. Each value of each variable has a bitset (an
+# int) of the allowed tuples that contain it, so a partial assignment is
+# checked by ANDing bitsets, and supports() is simple tabular reduction done
+# a machine word at a time: the tuples still valid under the domains are the
+# AND over the variables of the OR of their values' bitsets, and a value
+# keeps its support only if its bitset meets them. Values must be hashable.
+class TableConstraint(Constraint[V, D]):
+    def __init__(self, variables: List[V], tuples: Iterable[Sequence[D]]) -> None:
+        super().__init__(variables)
+        rows: Dict[V, Dict[D, List[int]]] = {v: {} for v in variables}
+        self.size: int = 0 # number of allowed tuples
+        for row in tuples:
+            if len(row) != len(variables):
+                raise ValueError(f"Tuple {tuple(row)} does not match {len(variables)} variables")
+            for variable, value in zip(variables, row):
+                rows[variable].setdefault(value, []).append(self.size)
+            self.size += 1
+        self.masks: Dict[V, Dict[D, int]] = {v: {value: _bitset(indices, self.size) for value, indices in values.items()}
+                                             for v, values in rows.items()}
+
+    def satisfied(self, assignment: Dict[V, D]) -> bool:
+        return self._live(assignment) != 0
+
+    def satisfied_incremental(self, assignment: Dict[V, D], last_variable: V, last_value: D) -> bool:
+        return self._live(assignment) != 0
+
+    # The assigned variables, in assignment order, up to the one that left no allowed tuple
+    def culprits(self, assignment: Dict[V, D], last_variable: V, last_value: D) -> Set[V]:
+        live: int = self.masks[last_variable].get(last_value, 0)
+        blamed: Set[V] = set()
+        for variable in assignment:
+            if variable != last_variable and variable in self.masks:
+                blamed.add(variable)
+                live &= self.masks[variable].get(assignment[variable], 0)
+                if not live:
+                    break
+        return blamed
+
+    def supports(self, domains: Dict[V, List[D]], variable: V) -> Optional[List[D]]:
+        live: int = (1 << self.size) - 1
+        for other in self.variables:
+            masks: Dict[D, int] = self.masks[other]
+            union: int = 0
+            for value in domains[other]:
+                union |= masks.get(value, 0)
+            live &= union
+            if not live:
+                return []
+        masks = self.masks[variable]
+        return [value for value in domains[variable] if masks.get(value, 0) & live]
+
+    # The allowed tuples that agree with every assigned variable of the constraint
+    def _live(self, assignment: Dict[V, D]) -> int:
+        live: int = -1
+        for variable in self.variables:
+            if variable in assignment:
+                live &= self.masks[variable].get(assignment[variable], 0)
+                if not live:
+                    return 0
+        return live
+
+
+# An int of size bits with the bits at indices set
+def _bitset(indices: List[int], size: int) -> int:
+    bits: bytearray = bytearray((size + 7) // 8)
+    for index in indices:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
+
+
+# The variables must all take different values. Checking an assignment only
+# compares the last value with the others, but supports() filters domains
+# the way Régin does: a value stays only if some maximum matching of the
+# variables to their values uses it, i.e. if it is matched, lies on an
+# alternating path from an unmatched value, or lies on an alternating cycle
+# (both ends in the same strongly connected component). That catches what
+# pairwise checks never see, such as n variables sharing n - 1 values.
+# All the domains of the constraint are filtered at once; the result is
+# reused until one of the domain lists is replaced, and the matching warm
+# starts the next one. Values must be hashable.
+class AllDifferent(Constraint[V, D]):
+    def __init__(self, variables: List[V]) -> None:
+        super().__init__(variables)
+        self._filtered_from: List[List[D]] = [] # the domain lists that _filtered was computed from
+        self._filtered: Dict[V, List[D]] = {}
+        self._matching: Dict[V, D] = {}
+
+    def satisfied(self, assignment: Dict[V, D]) -> bool:
+        values: List[D] = [assignment[v] for v in self.variables if v in assignment]
+        return len(set(values)) == len(values)
+
+    def satisfied_incremental(self, assignment: Dict[V, D], last_variable: V, last_value: D) -> bool:
+        for variable in self.variables:
+            if variable != last_variable and variable in assignment and assignment[variable] == last_value:
+                return False
+        return True
+
+    def culprits(self, assignment: Dict[V, D], last_variable: V, last_value: D) -> Set[V]:
+        return set(self._holding(assignment, last_variable, last_value))
+
+    def conflicts(self, assignment: Dict[V, D], variable: V, value: D) -> int:
+        return len(self._holding(assignment, variable, value))
+
+    def conflicting(self, assignment: Dict[V, D], variable: V) -> Iterable[V]:
+        return self._holding(assignment, variable, assignment[variable])
+
+    def supports(self, domains: Dict[V, List[D]], variable: V) -> Optional[List[D]]:
+        current: List[List[D]] = [domains[v] for v in self.variables]
+        if len(current) != len(self._filtered_from) or \
+                any(new is not old for new, old in zip(current, self._filtered_from)):
+            self._filtered = self._filter(domains)
+            self._filtered_from = current
+        return self._filtered[variable]
+
+    # The other assigned variables whose value is value
+    def _holding(self, assignment: Dict[V, D], variable: V, value: D) -> List[V]:
+        return [v for v in self.variables if v != variable and v in assignment and assignment[v] == value]
+
+    def _filter(self, domains: Dict[V, List[D]]) -> Dict[V, List[D]]:
+        variables: List[V] = self.variables
+        matched: Dict[V, D] = {}
+        owner: Dict[D, V] = {}
+        for variable in variables:
+            if variable in self._matching:
+                value: D = self._matching[variable]
+                if value not in owner and value in domains[variable]:
+                    matched[variable] = value
+                    owner[value] = variable
+        for variable in variables:
+            if variable not in matched and not self._augment(variable, domains, matched, owner):
+                return {v: [] for v in variables}
+        self._matching = matched
+
+        # nodes 0 .. k - 1 are the variables and the values follow; matched
+        # edges point from variable to value and the others from value to variable
+        k: int = len(variables)
+        ids: Dict[D, int] = {}
+        for variable in variables:
+            for value in domains[variable]:
+                if value not in ids:
+                    ids[value] = k + len(ids)
+        edges: List[List[int]] = [[ids[matched[v]]] for v in variables] + [[] for _ in ids]
+        for i, variable in enumerate(variables):
+            for value in domains[variable]:
+                if value != matched[variable]:
+                    edges[ids[value]].append(i)
+
+        # what an alternating path from an unmatched value reaches
+        reached: List[bool] = [False] * len(edges)
+        pending: List[int] = [node for value, node in ids.items() if value not in owner]
+        for node in pending:
+            reached[node] = True
+        while pending:
+            node = pending.pop()
+            for other in edges[node]:
+                if not reached[other]:
+                    reached[other] = True
+                    pending.append(other)
+
+        component: List[int] = _strongly_connected_components(edges)
+        return {variable: [value for value in domains[variable]
+                           if value == matched[variable] or reached[ids[value]] or component[i] == component[ids[value]]]
+                for i, variable in enumerate(variables)}
+
+    # Kuhn's augmenting path search from an unmatched variable, without recursion
+    @staticmethod
+    def _augment(start: V, domains: Dict[V, List[D]], matched: Dict[V, D], owner: Dict[D, V]) -> bool:
+        visited: Set[D] = set()
+        # the variables on the path with the values left to try, and the value taken at each of them
+        stack: List[Tuple[V, Iterator[D]]] = [(start, iter(domains[start]))]
+        taken: List[D] = []
+        while stack:
+            for value in stack[-1][1]:
+                if value in visited:
+                    continue
+                visited.add(value)
+                taken.append(value)
+                if value not in owner:
+                    for (variable, _), new in zip(stack, taken):
+                        matched[variable] = new
+                        owner[new] = variable
+                    return True
+                stack.append((owner[value], iter(domains[owner[value]])))
+                break
+            else:
+                stack.pop()
+                if taken:
+                    taken.pop()
+        return False
+
+
+# Tarjan's algorithm without recursion: the component number of every node
+# of the graph given as adjacency lists
+def _strongly_connected_components(edges: List[List[int]]) -> List[int]:
+    index: List[int] = [-1] * len(edges)
+    low: List[int] = [0] * len(edges)
+    component: List[int] = [-1] * len(edges)
+    stack: List[int] = []
+    counter: int = 0
+    components: int = 0
+    for root in range(len(edges)):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        work: List[Tuple[int, Iterator[int]]] = [(root, iter(edges[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if index[successor] == -1:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    work.append((successor, iter(edges[successor])))
+                    break
+                if component[successor] == -1:  # still on the stack
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent: int = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    while True:
+                        member: int = stack.pop()
+                        component[member] = components
+                        if member == node:
+                            break
+                    components += 1
+    return component
+
+
+# A variable selector picks the next variable to assign and returns its
+# position in the unassigned list. The unassigned list holds the variables
+# in reverse order, so that the static order is simply its last element.
+VariableSelector = Callable[["CSP[V, D]", List[V], Dict[V, List[D]]], int]
+# A value orderer returns the values of a variable in the order to try them
+ValueOrderer = Callable[["CSP[V, D]", V, Dict[V, D], Dict[V, List[D]]], List[D]]
+# A variable, some other variables and the ids of their values, which leave
+# the first variable without a consistent value
+Nogood = Tuple[V, Tuple[V, ...], Tuple[int, ...]]
+# Called with a variable and a value when the search gives the value to the
+# variable, and again when it takes the value back
+SearchCallback = Callable[[V, D], None]
+
+
+# What the last search of a CSP did. A fresh one is made for every search.
+@dataclass
+class SearchStats:
+    nodes: int = 0 # values tried (moves, for min_conflicts)
+    backtracks: int = 0 # variables that ran out of values
+    max_depth: int = 0 # most variables assigned by the search at the same time
+    pruned: int = 0 # domain values removed by propagation
+    backjumps: int = 0 # dead ends of a backjumping search that skipped over variables
+    nogood_hits: int = 0 # dead ends of a backjumping search found in the nogood cache
+    stopped: bool = False # cut short by a node limit or a stop callback
+    seconds: float = 0.0 # wall time spent searching, not counting the caller's time between solutions
+    checks: Dict[str, int] = field(default_factory=dict) # constraint evaluations per constraint class
+    check_seconds: Dict[str, float] = field(default_factory=dict) # time spent in them, when profiling
+
+
+# How a search within a budget ended
+class SearchStatus(Enum):
+    SOLVED = "solved"
+    UNSATISFIABLE = "unsatisfiable"
+    BUDGET_EXHAUSTED = "budget exhausted"
+
+
+# The outcome of CSP.solve(). partial is the solution when there is one, and
+# otherwise the consistent partial assignment with the most variables that
+# the search reached.
+class SearchResult(NamedTuple):
+    status: SearchStatus
+    solution: Optional[Dict[V, D]]
+    partial: Dict[V, D]
+
+
+# Pick variables in the order they were given to the CSP
+def first_unassigned(csp: CSP[V, D], unassigned: List[V], domains: Dict[V, List[D]]) -> int:
+    return len(unassigned) - 1
+
+
+# Minimum remaining values: pick the variable with the smallest current domain,
+# breaking ties by the number of other variables it shares constraints with
+def minimum_remaining_values(csp: CSP[V, D], unassigned: List[V], domains: Dict[V, List[D]]) -> int:
+    best: int = len(unassigned) - 1
+    best_key: Tuple[int, int] = (len(domains[unassigned[best]]), -len(csp.neighbors[unassigned[best]]))
+    for i in range(best - 1, -1, -1):
+        variable: V = unassigned[i]
+        key: Tuple[int, int] = (len(domains[variable]), -len(csp.neighbors[variable]))
+        if key < best_key:
+            best, best_key = i, key
+    return best
+
+
+# Try the values in the order of the domain
+def domain_order(csp: CSP[V, D], variable: V, assignment: Dict[V, D], domains: Dict[V, List[D]]) -> List[D]:
+    return domains[variable]
+
+
+# Least constraining value: try first the values that rule out the fewest
+# values in the domains of the unassigned neighbors
+def least_constraining_value(csp: CSP[V, D], variable: V, assignment: Dict[V, D], domains: Dict[V, List[D]]) -> List[D]:
+    arcs: List[Tuple[V, Constraint[V, D]]] = [(y, constraint) for constraint in csp.constraints[variable]
+                                              for y in constraint.variables if y != variable and y not in assignment]
+
+    def ruled_out(value: D) -> int:
+        return sum(1 for y, constraint in arcs for vy in domains[y]
+                   if not constraint.satisfied({variable: value, y: vy}))
+    return sorted(domains[variable], key=ruled_out)
+
 
 # A constraint satisfaction problem consists of variables of type V
 # that have ranges of values known as domains of type D and constraints
 # that determine whether a particular variable's domain selection is valid
 class CSP(Generic[V, D]):
-    def __init__(self, variables: List[V], domains: Dict[V, List[D]]) -> None:
+    def __init__(self, variables: List[V], domains: Dict[V, List[D]],
+                 select_variable: VariableSelector = first_unassigned,
+                 order_values: ValueOrderer = domain_order) -> None:
         self.variables: List[V] = variables # variables to be constrained
         self.domains: Dict[V, List[D]] = domains # domain of each variable
         self.constraints: Dict[V, List[Constraint[V, D]]] = {}
+        self._neighbors: Optional[Dict[V, Set[V]]] = None # built by the neighbors property on first use
+        self.select_variable: VariableSelector = select_variable
+        self.order_values: ValueOrderer = order_values
+        self.stats: SearchStats = SearchStats() # what the last search did
+        self.worker_nodes: Dict[int, int] = {} # values tried by each worker process in the last parallel search
+        # Set these to trace the systematic searches; left as None they cost nothing.
+        # Every call of on_assign is later matched by an on_unassign, unless the
+        # search ends with the value still assigned.
+        self.on_assign: Optional[SearchCallback] = None
+        self.on_unassign: Optional[SearchCallback] = None
+        self.profile: bool = False # also time the constraint checks, per constraint class
         for variable in self.variables:
             self.constraints[variable] = []
             if variable not in self.domains:
@@ -48,36 +448,619 @@ class CSP(Generic[V, D]):
 
     def add_constraint(self, constraint: Constraint[V, D]) -> None:
         for variable in constraint.variables:
-            if variable not in self.variables:
+            if variable not in self.constraints:
                 raise LookupError("Variable in constraint not in CSP")
             else:
                 self.constraints[variable].append(constraint)
+        self._neighbors = None
+
+    # The variables sharing a constraint with each variable. Built lazily, since
+    # a constraint over all n variables gives every variable n - 1 neighbors,
+    # which a search that never asks for them should not pay for.
+    @property
+    def neighbors(self) -> Dict[V, Set[V]]:
+        if self._neighbors is None:
+            self._neighbors = {variable: set() for variable in self.variables}
+            for variable, constraints in self.constraints.items():
+                for constraint in constraints:
+                    self._neighbors[variable].update(v for v in constraint.variables if v != variable)
+        return self._neighbors
 
     # Check if the value assignment is consistent by checking all constraints
-    # for the given variable against it
+    # for the given variable against it. The variable must be the one assigned
+    # last, since the constraints only check the pairs that involve it.
     def consistent(self, variable: V, assignment: Dict[V, D]) -> bool:
+        value: D = assignment[variable]
+        checks: Dict[str, int] = self.stats.checks
         for constraint in self.constraints[variable]:
-            if not constraint.satisfied(assignment):
+            name: str = type(constraint).__name__
+            checks[name] = checks.get(name, 0) + 1
+            if not constraint.satisfied_incremental(assignment, variable, value):
                 return False
         return True
 
-    def backtracking_search(self, assignment: Dict[V, D] = {}) -> Optional[Dict[V, D]]:
-        # assignment is complete if every variable is assigned (our base case)
-        if len(assignment) == len(self.variables):
-            return assignment
-
-        # get all variables in the CSP but not in the assignment
-        unassigned: List[V] = [v for v in self.variables if v not in assignment]
-
-        # get the every possible domain value of the first unassigned variable
-        first: V = unassigned[0]
-        for value in self.domains[first]:
-            local_assignment = assignment.copy()
-            local_assignment[first] = value
-            # if we're still consistent, we recurse (continue)
-            if self.consistent(first, local_assignment):
-                result: Optional[Dict[V, D]] = self.backtracking_search(local_assignment)
-                # if we didn't find the result, we will end up backtracking
-                if result is not None:
-                    return result
+    # consistent(), also timing every check; what the searches use when self.profile is set
+    def _timed_consistent(self, variable: V, assignment: Dict[V, D]) -> bool:
+        value: D = assignment[variable]
+        checks: Dict[str, int] = self.stats.checks
+        check_seconds: Dict[str, float] = self.stats.check_seconds
+        for constraint in self.constraints[variable]:
+            name: str = type(constraint).__name__
+            checks[name] = checks.get(name, 0) + 1
+            start: float = time.perf_counter()
+            satisfied: bool = constraint.satisfied_incremental(assignment, variable, value)
+            check_seconds[name] = check_seconds.get(name, 0.0) + time.perf_counter() - start
+            if not satisfied:
+                return False
+        return True
+
+    # Every ordered pair of distinct variables that share a constraint is an
+    # arc. Constraints over more than two variables are relaxed pairwise, which
+    # is sound because satisfied() reports a violation on any partial assignment
+    # that can no longer be extended into a solution.
+    def arcs(self) -> List[Tuple[V, V, Constraint[V, D]]]:
+        arcs: List[Tuple[V, V, Constraint[V, D]]] = []
+        for constraint in {id(c): c for cs in self.constraints.values() for c in cs}.values():
+            for x in constraint.variables:
+                for y in constraint.variables:
+                    if x != y:
+                        arcs.append((x, y, constraint))
+        return arcs
+
+    # Remove the values of x that have no supporting value in the domain of y,
+    # or, for a constraint that implements supports(), no support at all.
+    # If a trail is given, the replaced domain is recorded on it so that the
+    # search can undo the removal when it backtracks.
+    def revise(self, domains: Dict[V, List[D]], x: V, y: V, constraint: Constraint[V, D],
+               trail: Optional[List[Tuple[V, List[D]]]] = None) -> bool:
+        evaluations: int = 1
+        supported: Optional[List[D]] = constraint.supports(domains, x)
+        if supported is None:
+            supported = []
+            evaluations = 0
+            for vx in domains[x]:
+                for vy in domains[y]:
+                    evaluations += 1
+                    if constraint.satisfied({x: vx, y: vy}):
+                        supported.append(vx)
+                        break
+        name: str = type(constraint).__name__
+        self.stats.checks[name] = self.stats.checks.get(name, 0) + evaluations
+        if len(supported) == len(domains[x]):
+            return False
+        self.stats.pruned += len(domains[x]) - len(supported)
+        if trail is not None:
+            trail.append((x, domains[x]))
+        domains[x] = supported
+        return True
+
+    # AC-3: shrink domains in place until every arc is consistent. Returns False
+    # as soon as some domain is wiped out, which proves there is no solution.
+    def ac3(self, domains: Dict[V, List[D]], queue: Optional[List[Tuple[V, V, Constraint[V, D]]]] = None,
+            trail: Optional[List[Tuple[V, List[D]]]] = None) -> bool:
+        if queue is None:
+            queue = self.arcs()
+        pending: Deque[Tuple[V, V, Constraint[V, D]]] = deque(queue)
+        while pending:
+            x, y, constraint = pending.popleft()
+            if self.revise(domains, x, y, constraint, trail):
+                if not domains[x]:
+                    return False
+                # x lost values, so every arc pointing at x must be rechecked
+                for other in self.constraints[x]:
+                    for z in other.variables:
+                        if z != x and z != y:
+                            pending.append((z, x, other))
+        return True
+
+    # Arcs pointing at variable, used to restore arc consistency after it is assigned
+    def arcs_into(self, variable: V, assignment: Dict[V, D]) -> List[Tuple[V, V, Constraint[V, D]]]:
+        return [(z, variable, constraint) for constraint in self.constraints[variable]
+                for z in constraint.variables if z != variable and z not in assignment]
+
+    # Find the first solution, or None if there is no solution. With backjump,
+    # dead ends jump straight back to the variable that caused them instead
+    # of the previous one (see _backjump_search); it cannot be combined with
+    # propagate.
+    def backtracking_search(self, assignment: Optional[Dict[V, D]] = None, propagate: bool = False,
+                            backjump: bool = False) -> Optional[Dict[V, D]]:
+        if backjump:
+            if propagate:
+                raise ValueError("Backjumping does not support propagation")
+            self.stats = SearchStats()
+            start: float = time.perf_counter()
+            solution: Optional[Dict[V, D]] = self._backjump_search(assignment)
+            self.stats.seconds = time.perf_counter() - start
+            return solution
+        return next(self._search(assignment, propagate), None)
+
+    # backtracking_search() within a budget: after timeout seconds or once
+    # node_limit values were tried, the search stops and reports that its
+    # budget was exhausted. The node limit is exact and costs one comparison
+    # per node. The clock is read every STOP_CHECK_INTERVAL nodes, so the
+    # timeout may be overrun by that many nodes (and by the initial AC-3 pass
+    # when propagating).
+    def solve(self, assignment: Optional[Dict[V, D]] = None, propagate: bool = False, backjump: bool = False,
+              timeout: Optional[float] = None, node_limit: Optional[int] = None) -> SearchResult:
+        stop: Optional[Callable[[], bool]] = None
+        if timeout is not None:
+            deadline: float = time.perf_counter() + timeout
+            stop = lambda: time.perf_counter() >= deadline
+        deepest: Dict[V, D] = {} if assignment is None else dict(assignment)
+        solution: Optional[Dict[V, D]]
+        if backjump:
+            if propagate:
+                raise ValueError("Backjumping does not support propagation")
+            self.stats = SearchStats()
+            start: float = time.perf_counter()
+            solution = self._backjump_search(assignment, stop, node_limit, deepest)
+            self.stats.seconds = time.perf_counter() - start
+        else:
+            solution = next(self._search(assignment, propagate, stop, node_limit, deepest), None)
+        if solution is not None:
+            return SearchResult(SearchStatus.SOLVED, solution, solution)
+        if self.stats.stopped:
+            return SearchResult(SearchStatus.BUDGET_EXHAUSTED, None, deepest)
+        return SearchResult(SearchStatus.UNSATISFIABLE, None, deepest)
+
+    # Lazily yield every solution, or only the first limit solutions. Each
+    # solution is a fresh dict, and none of them is kept once it was yielded.
+    def solutions(self, assignment: Optional[Dict[V, D]] = None, propagate: bool = False,
+                  limit: Optional[int] = None) -> Iterator[Dict[V, D]]:
+        for found, solution in enumerate(self._search(assignment, propagate)):
+            if limit is not None and found >= limit:
+                return
+            yield dict(solution)
+
+    # Count the solutions (up to limit) without materializing any of them
+    def count_solutions(self, assignment: Optional[Dict[V, D]] = None, propagate: bool = False,
+                        limit: Optional[int] = None) -> int:
+        count: int = 0
+        for _ in self._search(assignment, propagate):
+            if limit is not None and count >= limit:
+                break
+            count += 1
+        return count
+
+    # _search_tree() with a fresh self.stats, timed
+    def _search(self, assignment: Optional[Dict[V, D]], propagate: bool,
+                stop: Optional[Callable[[], bool]] = None, node_limit: Optional[int] = None,
+                deepest: Optional[Dict[V, D]] = None) -> Iterator[Dict[V, D]]:
+        stats: SearchStats = SearchStats()
+        self.stats = stats
+        start: float = time.perf_counter()
+        for solution in self._search_tree(assignment, propagate, stop, node_limit, deepest):
+            stats.seconds += time.perf_counter() - start
+            yield solution
+            start = time.perf_counter()
+        stats.seconds += time.perf_counter() - start
+
+    # Depth-first search over a single assignment that is mutated in place,
+    # yielding that same dict every time it is complete. Instead of recursing,
+    # every variable on the current branch has a frame on an explicit stack,
+    # and every domain replaced by propagation is recorded on a trail, so
+    # backtracking undoes exactly what the branch changed.
+    # If stop is given, it is polled every STOP_CHECK_INTERVAL nodes and the
+    # search ends early once it returns True; it also ends before trying
+    # more than node_limit values. If deepest is given, it is kept equal to
+    # the largest consistent assignment seen so far.
+    def _search_tree(self, assignment: Optional[Dict[V, D]], propagate: bool,
+                     stop: Optional[Callable[[], bool]] = None, node_limit: Optional[int] = None,
+                     deepest: Optional[Dict[V, D]] = None) -> Iterator[Dict[V, D]]:
+        # with propagation, run AC-3 once up front and maintain arc
+        # consistency (MAC) after every assignment; self.stats.pruned
+        # reports how many domain values were removed along the way
+        stats: SearchStats = self.stats
+        consistent: Callable[[V, Dict[V, D]], bool] = self._timed_consistent if self.profile else self.consistent
+        on_assign: Optional[SearchCallback] = self.on_assign
+        on_unassign: Optional[SearchCallback] = self.on_unassign
+        # the node count at which to check the budget next
+        limit: int = sys.maxsize if node_limit is None else node_limit
+        poll_at: int = limit if stop is None else min(limit, STOP_CHECK_INTERVAL)
+        assignment = {} if assignment is None else dict(assignment)
+        domains: Dict[V, List[D]] = self.domains
+        if propagate:
+            domains = {v: list(values) for v, values in self.domains.items()}
+            for variable, value in assignment.items():
+                domains[variable] = [value]
+            if not self.ac3(domains):
+                return
+
+        unassigned: List[V] = [v for v in reversed(self.variables) if v not in assignment]
+        trail: List[Tuple[V, List[D]]] = []
+        # each frame holds the variable, its position in unassigned, the values
+        # left to try and the trail length from before the variable was assigned
+        frames: List[Tuple[V, int, Iterator[D], int]] = []
+        descend: bool = True
+        while True:
+            if descend:
+                # assignment is complete if every variable is assigned;
+                # afterwards the search resumes with the next value of the
+                # last variable, as if the solution had been a dead end
+                if not unassigned:
+                    yield assignment
+                    if not frames:
+                        return
+                else:
+                    # swap the selected variable to the end of the unassigned list and pop it,
+                    # so that it can be put back in place in constant time when backtracking
+                    index: int = self.select_variable(self, unassigned, domains)
+                    unassigned[index], unassigned[-1] = unassigned[-1], unassigned[index]
+                    variable: V = unassigned.pop()
+                    frames.append((variable, index, iter(self.order_values(self, variable, assignment, domains)), len(trail)))
+                    if len(frames) > stats.max_depth:
+                        stats.max_depth = len(frames)
+
+            variable, index, values, mark = frames[-1]
+            descend = False
+            for value in values:
+                if stats.nodes >= poll_at:
+                    if stats.nodes >= limit or (stop is not None and stop()):
+                        stats.stopped = True
+                        return
+                    poll_at = min(limit, stats.nodes + STOP_CHECK_INTERVAL)
+                stats.nodes += 1
+                if on_unassign is not None and variable in assignment:
+                    on_unassign(variable, assignment[variable])
+                self._undo(domains, trail, mark)
+                assignment[variable] = value
+                if on_assign is not None:
+                    on_assign(variable, value)
+                # if we're still consistent, we go one level deeper
+                if consistent(variable, assignment):
+                    if not propagate:
+                        descend = True
+                        break
+                    trail.append((variable, domains[variable]))
+                    domains[variable] = [value]
+                    if self.ac3(domains, self.arcs_into(variable, assignment), trail):
+                        descend = True
+                        break
+            if descend:
+                if deepest is not None and len(assignment) > len(deepest):
+                    deepest.clear()
+                    deepest.update(assignment)
+                continue
+
+            # every value failed, so we backtrack to the previous variable
+            stats.backtracks += 1
+            if on_unassign is not None and variable in assignment:
+                on_unassign(variable, assignment[variable])
+            self._undo(domains, trail, mark)
+            assignment.pop(variable, None)
+            unassigned.append(variable)
+            unassigned[index], unassigned[-1] = unassigned[-1], unassigned[index]
+            frames.pop()
+            if not frames:
+                return
+
+    # Conflict-directed backjumping. Every variable on the branch collects a
+    # conflict set: the earlier variables of each constraint that rejected one
+    # of its values. When it runs out of values, the search jumps back to the
+    # most recently assigned variable of that set, which inherits the rest of
+    # the set, and the variables in between are unassigned without trying
+    # their other values, since none of them took part in the failure.
+    #
+    # A dead end also proves that the values of its conflict set leave the
+    # variable without a value. That nogood is kept in a bounded LRU cache,
+    # and whenever the variable is selected again under the same values it
+    # fails at once. Nogoods are grouped by the variables they mention, so a
+    # lookup is one dict probe per group. Values are compared by identity,
+    # which is exact because they all come from the domain lists, and keeps
+    # unhashable values usable.
+    # self.stats.backjumps and self.stats.nogood_hits report how often each happened.
+    # stop, node_limit and deepest work as for _search_tree().
+    def _backjump_search(self, assignment: Optional[Dict[V, D]], stop: Optional[Callable[[], bool]] = None,
+                         node_limit: Optional[int] = None, deepest: Optional[Dict[V, D]] = None) -> Optional[Dict[V, D]]:
+        stats: SearchStats = self.stats
+        on_assign: Optional[SearchCallback] = self.on_assign
+        on_unassign: Optional[SearchCallback] = self.on_unassign
+        limit: int = sys.maxsize if node_limit is None else node_limit
+        poll_at: int = limit if stop is None else min(limit, STOP_CHECK_INTERVAL)
+        assignment = {} if assignment is None else dict(assignment)
+        given: Set[V] = set(assignment)  # can never be the culprit, so kept out of conflict sets
+        # nogoods in LRU order, and for each variable the groups of variables
+        # its nogoods mention along with how many nogoods use each group
+        nogoods: OrderedDict[Nogood, None] = OrderedDict()
+        scopes: Dict[V, Dict[Tuple[V, ...], int]] = {v: {} for v in self.variables}
+        depth: Dict[V, int] = {}
+        unassigned: List[V] = [v for v in reversed(self.variables) if v not in assignment]
+        # each frame holds the variable, its position in unassigned, the values
+        # left to try and its conflict set
+        frames: List[Tuple[V, int, Iterator[D], Set[V]]] = []
+        descend: bool = True
+        while True:
+            if descend:
+                if not unassigned:
+                    return assignment
+                index: int = self.select_variable(self, unassigned, self.domains)
+                unassigned[index], unassigned[-1] = unassigned[-1], unassigned[index]
+                variable: V = unassigned.pop()
+                depth[variable] = len(frames)
+                if len(frames) >= stats.max_depth:
+                    stats.max_depth = len(frames) + 1
+                known: Optional[Nogood] = self._known_nogood(variable, assignment, nogoods, scopes[variable])
+                if known is None:
+                    frames.append((variable, index, iter(self.order_values(self, variable, assignment, self.domains)), set()))
+                else:
+                    stats.nogood_hits += 1
+                    frames.append((variable, index, iter(()), set(known[1])))
+
+            variable, index, values, conflicts = frames[-1]
+            descend = False
+            for value in values:
+                if stats.nodes >= poll_at:
+                    if stats.nodes >= limit or (stop is not None and stop()):
+                        stats.stopped = True
+                        return None
+                    poll_at = min(limit, stats.nodes + STOP_CHECK_INTERVAL)
+                stats.nodes += 1
+                if on_unassign is not None and variable in assignment:
+                    on_unassign(variable, assignment[variable])
+                assignment[variable] = value
+                if on_assign is not None:
+                    on_assign(variable, value)
+                culprits: Optional[Set[V]] = self._culprits(variable, assignment, given)
+                if culprits is None:
+                    descend = True
+                    break
+                conflicts |= culprits
+            if descend:
+                if deepest is not None and len(assignment) > len(deepest):
+                    deepest.clear()
+                    deepest.update(assignment)
+                continue
+
+            # every value failed: remember why, then jump back to the latest culprit
+            stats.backtracks += 1
+            if on_unassign is not None and variable in assignment:
+                on_unassign(variable, assignment[variable])
+            assignment.pop(variable, None)
+            if not conflicts:
+                return None
+            culprit: V = max(conflicts, key=depth.__getitem__)
+            target: int = depth[culprit]
+            if NOGOOD_CACHE_SIZE > 0:
+                scope: Tuple[V, ...] = tuple(v for v in assignment if v in conflicts)
+                nogood: Nogood = (variable, scope, tuple(id(assignment[v]) for v in scope))
+                if nogood not in nogoods:
+                    nogoods[nogood] = None
+                    scopes[variable][scope] = scopes[variable].get(scope, 0) + 1
+                    if len(nogoods) > NOGOOD_CACHE_SIZE:
+                        evicted, old_scope, _ = nogoods.popitem(last=False)[0]
+                        scopes[evicted][old_scope] -= 1
+                        if not scopes[evicted][old_scope]:
+                            del scopes[evicted][old_scope]
+            if target < len(frames) - 2:
+                stats.backjumps += 1
+            while len(frames) > target + 1:
+                skipped, index, _, _ = frames.pop()
+                if on_unassign is not None and skipped in assignment:
+                    on_unassign(skipped, assignment[skipped])
+                assignment.pop(skipped, None)
+                unassigned.append(skipped)
+                unassigned[index], unassigned[-1] = unassigned[-1], unassigned[index]
+            frames[-1][3].update(v for v in conflicts if v != culprit)
+
+    # The variables to blame if the value just given to variable breaks a
+    # constraint (the culprits of the first broken one), or None if it breaks none
+    def _culprits(self, variable: V, assignment: Dict[V, D], given: Set[V]) -> Optional[Set[V]]:
+        value: D = assignment[variable]
+        for constraint in self.constraints[variable]:
+            if not constraint.satisfied_incremental(assignment, variable, value):
+                return constraint.culprits(assignment, variable, value) - given
+        return None
+
+    # A cached nogood of variable that the current assignment matches, if any
+    @staticmethod
+    def _known_nogood(variable: V, assignment: Dict[V, D], nogoods: OrderedDict[Nogood, None],
+                      scopes: Dict[Tuple[V, ...], int]) -> Optional[Nogood]:
+        for scope in scopes:
+            if all(v in assignment for v in scope):
+                nogood: Nogood = (variable, scope, tuple(id(assignment[v]) for v in scope))
+                if nogood in nogoods:
+                    nogoods.move_to_end(nogood)
+                    return nogood
         return None
+
+    # Min-conflicts local search. Every variable first gets, in random order,
+    # the value with the fewest conflicts with those assigned before it. Then,
+    # as long as some variable is in conflict, a random conflicted variable is
+    # moved to its other value with the fewest conflicts, even when that is no
+    # better than the current one, so plateaus get crossed. A value that a
+    # variable just left is tabu for it during the next tabu moves, which
+    # keeps the search from cycling, and after max_steps moves without a
+    # solution it restarts from a new greedy assignment, up to restarts times.
+    #
+    # Only the constraints of the moved variable are asked about its values,
+    # so with counting constraints a move costs O(degree) per value tried.
+    # Conflicted variables are kept in a set: a moved variable and the ones it
+    # now conflicts with are added, and one found to have no conflict left is
+    # dropped when it is picked. With sample, only that many random values
+    # are tried per move, first among the preferred values of the constraints
+    # and then among the whole domain (the first one without conflicts wins),
+    # which is how domains with a million values stay affordable.
+    #
+    # Local search cannot prove that there is no solution, so None only means
+    # that none was found. self.stats.nodes reports the number of moves.
+    def min_conflicts(self, max_steps: int = 100_000, restarts: int = 10, tabu: int = 3,
+                      sample: Optional[int] = None, seed: Optional[int] = None) -> Optional[Dict[V, D]]:
+        rng: random.Random = random.Random(seed)
+        constraints: List[Constraint[V, D]] = list({id(c): c for cs in self.constraints.values() for c in cs}.values())
+        self.stats = SearchStats()
+        start: float = time.perf_counter()
+        solution: Optional[Dict[V, D]] = self._min_conflicts(constraints, max_steps, restarts, tabu, sample, rng)
+        self.stats.seconds = time.perf_counter() - start
+        return solution
+
+    def _min_conflicts(self, constraints: List[Constraint[V, D]], max_steps: int, restarts: int, tabu: int,
+                       sample: Optional[int], rng: random.Random) -> Optional[Dict[V, D]]:
+        stats: SearchStats = self.stats
+        for _ in range(restarts + 1):
+            for constraint in constraints:
+                constraint.reset_conflicts()
+            assignment: Dict[V, D] = {}
+            conflicted: List[V] = []
+            position: Dict[V, int] = {}  # index of each conflicted variable in conflicted
+            order: List[V] = list(self.variables)
+            rng.shuffle(order)
+            for variable in order:
+                value, count = self._least_conflicted(variable, assignment, rng, sample, ())
+                assignment[variable] = value
+                for constraint in self.constraints[variable]:
+                    constraint.moved(assignment, variable, None)
+                if count:
+                    self._add_conflicted(variable, assignment, conflicted, position)
+
+            recent: Deque[Tuple[V, D]] = deque()
+            tabu_moves: Set[Tuple[V, D]] = set()
+            steps: int = 0
+            while conflicted:
+                i: int = rng.randrange(len(conflicted))
+                variable = conflicted[i]
+                current: D = assignment[variable]
+                if not self._conflicts(variable, current, assignment):
+                    # no longer conflicted: swap it to the end and drop it
+                    last: V = conflicted.pop()
+                    if last != variable:
+                        conflicted[i] = last
+                        position[last] = i
+                    del position[variable]
+                    continue
+                if steps == max_steps:
+                    break
+                steps += 1
+                stats.nodes += 1
+                value, count = self._least_conflicted(variable, assignment, rng, sample, tabu_moves)
+                if value == current:
+                    continue
+                assignment[variable] = value
+                for constraint in self.constraints[variable]:
+                    constraint.moved(assignment, variable, current)
+                if count:
+                    self._add_conflicted(variable, assignment, conflicted, position)
+                if tabu:
+                    recent.append((variable, current))
+                    tabu_moves.add((variable, current))
+                    if len(recent) > tabu:
+                        tabu_moves.discard(recent.popleft())
+            else:
+                return assignment
+        return None
+
+    # Put variable and the variables conflicting with it in the conflicted set
+    def _add_conflicted(self, variable: V, assignment: Dict[V, D], conflicted: List[V], position: Dict[V, int]) -> None:
+        for constraint in self.constraints[variable]:
+            for other in constraint.conflicting(assignment, variable):
+                if other not in position:
+                    position[other] = len(conflicted)
+                    conflicted.append(other)
+        if variable not in position:
+            position[variable] = len(conflicted)
+            conflicted.append(variable)
+
+    # The number of violations variable would be part of with value
+    def _conflicts(self, variable: V, value: D, assignment: Dict[V, D]) -> int:
+        count: int = 0
+        for constraint in self.constraints[variable]:
+            count += constraint.conflicts(assignment, variable, value)
+        return count
+
+    # A value of variable with the fewest conflicts among the values tried,
+    # skipping its current value and tabu ones unless nothing else is left,
+    # and its conflict count
+    def _least_conflicted(self, variable: V, assignment: Dict[V, D], rng: random.Random,
+                          sample: Optional[int], tabu_moves: Collection[Tuple[V, D]]) -> Tuple[D, int]:
+        domain: List[D] = self.domains[variable]
+        candidates: Iterable[D]
+        if sample is None or sample >= len(domain):
+            candidates = rng.sample(domain, len(domain))
+        else:
+            pools: List[Sequence[D]] = [pool for constraint in self.constraints[variable]
+                                        for pool in (constraint.preferred_values(variable),) if pool]
+            pools.append(domain)
+            candidates = (pool[int(rng.random() * len(pool))] for pool in pools for _ in range(sample))
+        current: Optional[D] = assignment.get(variable)
+        best: Optional[D] = None
+        best_count: int = -1
+        for value in candidates:
+            if (variable, value) in tabu_moves or (value == current and variable in assignment):
+                continue
+            count: int = self._conflicts(variable, value, assignment)
+            if best_count < 0 or count < best_count:
+                best, best_count = value, count
+                if not count:
+                    break
+        if best_count < 0:  # every value tried was ruled out
+            return assignment[variable], self._conflicts(variable, assignment[variable], assignment)
+        return best, best_count
+
+    # Split the search tree on the values of the first split_depth variables
+    # and search the subtrees in a pool of worker processes. The first solution
+    # found is returned and the other workers are told to stop. The CSP, its
+    # constraints and its strategies are pickled to the workers, so they must
+    # be defined at module level. self.worker_nodes reports the values tried
+    # by each worker process, keyed by process id.
+    def parallel_search(self, propagate: bool = False, workers: Optional[int] = None,
+                        split_depth: int = 1) -> Optional[Dict[V, D]]:
+        subproblems: List[Dict[V, D]] = [{}]
+        for _ in range(split_depth):
+            subproblems = [extended for partial in subproblems for extended in self._split(partial)]
+        self.worker_nodes = {}
+        context = multiprocessing.get_context()
+        stop_event = context.Event()
+        solution: Optional[Dict[V, D]] = None
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(stop_event,)) as executor:
+            futures: List[Future] = [executor.submit(_search_subproblem, self, partial, propagate)
+                                     for partial in subproblems]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                pid, nodes, result = future.result()
+                self.worker_nodes[pid] = self.worker_nodes.get(pid, 0) + nodes
+                if result is not None and solution is None:
+                    solution = result
+                    stop_event.set()
+                    for pending in futures:
+                        pending.cancel()
+        return solution
+
+    # Extend a partial assignment with every consistent value of the next variable
+    def _split(self, partial: Dict[V, D]) -> List[Dict[V, D]]:
+        unassigned: List[V] = [v for v in reversed(self.variables) if v not in partial]
+        if not unassigned:
+            return [partial]
+        variable: V = unassigned[self.select_variable(self, unassigned, self.domains)]
+        extended: List[Dict[V, D]] = []
+        for value in self.order_values(self, variable, partial, self.domains):
+            candidate: Dict[V, D] = dict(partial)
+            candidate[variable] = value
+            if self.consistent(variable, candidate):
+                extended.append(candidate)
+        return extended
+
+    # Restore the domains replaced since the trail had the given length
+    @staticmethod
+    def _undo(domains: Dict[V, List[D]], trail: List[Tuple[V, List[D]]], mark: int) -> None:
+        while len(trail) > mark:
+            variable, values = trail.pop()
+            domains[variable] = values
+
+
+# Set in every worker process of CSP.parallel_search, so that a worker can
+# give up as soon as another worker has found a solution
+_stop_event: Optional[Event] = None
+
+
+def _init_worker(stop_event: Event) -> None:
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _search_subproblem(csp: CSP[V, D], partial: Dict[V, D], propagate: bool) -> Tuple[int, int, Optional[Dict[V, D]]]:
+    if _stop_event is not None and _stop_event.is_set():
+        return os.getpid(), 0, None
+    stop: Optional[Callable[[], bool]] = _stop_event.is_set if _stop_event is not None else None
+    solution: Optional[Dict[V, D]] = next(csp._search(partial, propagate, stop), None)
+    return os.getpid(), csp.stats.nodes, solution
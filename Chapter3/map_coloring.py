@@ -14,8 +14,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from csp import Constraint, CSP
-from typing import Dict, List, Optional
+from csp import Constraint, CSP, minimum_remaining_values
+from typing import Dict, List, Optional, Set, Tuple, TypeVar, Hashable, NamedTuple, Any
+from heapq import heapify, heappush, heappop
+import random
+import time
+
+V = TypeVar('V', bound=Hashable)  # a region of the map, i.e. a vertex of the graph
 
 
 class MapColoringConstraint(Constraint[str, str]):
@@ -33,8 +38,207 @@ class MapColoringConstraint(Constraint[str, str]):
         # color assigned to place2
         return assignment[self.place1] != assignment[self.place2]
 
+    def satisfied_incremental(self, assignment: Dict[str, str], last_variable: str, last_value: str) -> bool:
+        other: str = self.place2 if last_variable == self.place1 else self.place1
+        return other not in assignment or assignment[other] != last_value
+
+
+# Adjacency lists from a Chapter 4 style Graph (anything with vertex_count,
+# vertex_at and neighbors_for_index)
+def adjacency_from_graph(graph: Any) -> Dict[V, List[V]]:
+    return {graph.vertex_at(i): graph.neighbors_for_index(i) for i in range(graph.vertex_count)}
+
+
+# Color the graph with at most colors colors (numbered from 0), or return None
+# when it cannot be done. The search is complete, so None is a proof that no
+# such coloring exists.
+#
+# Vertices with fewer than colors neighbors can always be colored last, so they
+# are peeled off first, repeatedly, leaving only the core to search. The core
+# is searched DSATUR style: the uncolored vertex with the fewest colors left
+# (the most saturated) goes next, ties broken by degree, and coloring a vertex
+# removes its color from every uncolored neighbor (forward checking), failing
+# as soon as one runs out. Colors are interchangeable, so a vertex is only
+# ever offered one color that nobody uses yet.
+def dsatur_coloring(adjacency: Dict[V, List[V]], colors: int) -> Optional[Dict[V, int]]:
+    vertices: List[V] = list(adjacency)
+    index: Dict[V, int] = {vertex: i for i, vertex in enumerate(vertices)}
+    for vertex, adjacent in adjacency.items():
+        for other in adjacent:
+            if other not in index:
+                index[other] = len(vertices)
+                vertices.append(other)
+    n: int = len(vertices)
+    neighbor_sets: List[Set[int]] = [set() for _ in range(n)]
+    for vertex, adjacent in adjacency.items():
+        v: int = index[vertex]
+        for other in adjacent:
+            u: int = index[other]
+            if u == v:
+                return None  # a region bordering itself can never be colored
+            neighbor_sets[v].add(u)
+            neighbor_sets[u].add(v)
+    neighbors: List[List[int]] = [list(adjacent) for adjacent in neighbor_sets]
+    if colors < 1:
+        return {} if n == 0 else None
+
+    # peel vertices of degree < colors
+    degree: List[int] = [len(adjacent) for adjacent in neighbors]
+    in_core: List[bool] = [True] * n
+    peeled: List[int] = [v for v in range(n) if degree[v] < colors]
+    for v in peeled:
+        in_core[v] = False
+    for v in peeled:  # peeled grows while we walk it
+        for u in neighbors[v]:
+            if in_core[u]:
+                degree[u] -= 1
+                if degree[u] < colors:
+                    in_core[u] = False
+                    peeled.append(u)
+
+    color: List[int] = [-1] * n
+    if not _color_core(neighbors, in_core, degree, colors, color):
+        return None
+
+    # the peeled vertices, last peeled first, each see fewer than colors colored neighbors
+    for v in reversed(peeled):
+        taken: int = 0
+        for u in neighbors[v]:
+            if color[u] >= 0:
+                taken |= 1 << color[u]
+        free: int = ~taken
+        color[v] = (free & -free).bit_length() - 1
+    return {vertices[v]: color[v] for v in range(n)}
+
+
+def _color_core(neighbors: List[List[int]], in_core: List[bool], degree: List[int],
+                colors: int, color: List[int]) -> bool:
+    core: List[int] = [v for v in range(len(neighbors)) if in_core[v]]
+    full: int = (1 << colors) - 1
+    domain: List[int] = [full] * len(neighbors)
+    # entries are (colors left, -degree, vertex); stale ones are skipped when popped
+    heap: List[Tuple[int, int, int]] = [(colors, -degree[v], v) for v in core]
+    heapify(heap)
+    trail: List[Tuple[int, int]] = []  # (vertex, domain before it was narrowed)
+    frames: List[List[int]] = []  # [vertex, colors still to try, trail mark, colors used before]
+    remaining: int = len(core)
+    used: int = 0
+    while remaining:
+        while True:
+            size, _, v = heappop(heap)
+            if color[v] < 0 and domain[v].bit_count() == size:
+                break
+        frames.append([v, domain[v] & ((2 << used) - 1), len(trail), used])
+        remaining -= 1
+        while frames:
+            frame: List[int] = frames[-1]
+            v, options, mark, used_before = frame
+            while len(trail) > mark:
+                u, old = trail.pop()
+                domain[u] = old
+                heappush(heap, (old.bit_count(), -degree[u], u))
+            color[v] = -1
+            if not options:
+                frames.pop()
+                remaining += 1
+                heappush(heap, (domain[v].bit_count(), -degree[v], v))
+                continue
+            bit: int = options & -options
+            frame[1] = options ^ bit
+            color[v] = bit.bit_length() - 1
+            used = max(used_before, color[v] + 1)
+            wiped_out: bool = False
+            for u in neighbors[v]:
+                if in_core[u] and color[u] < 0 and domain[u] & bit:
+                    trail.append((u, domain[u]))
+                    domain[u] ^= bit
+                    if not domain[u]:
+                        wiped_out = True
+                        break
+                    heappush(heap, (domain[u].bit_count(), -degree[u], u))
+            if not wiped_out:
+                break
+        else:
+            return False
+    return True
+
+
+# The same problem for the generic CSP, one MapColoringConstraint per edge
+def coloring_csp(adjacency: Dict[V, List[V]], colors: int) -> CSP[V, int]:
+    variables: List[V] = list(adjacency)
+    csp: CSP[V, int] = CSP(variables, {v: list(range(colors)) for v in variables},
+                           select_variable=minimum_remaining_values)
+    seen: Set[Tuple[V, V]] = set()
+    for vertex, adjacent in adjacency.items():
+        for other in adjacent:
+            if (other, vertex) not in seen:
+                seen.add((vertex, other))
+                csp.add_constraint(MapColoringConstraint(vertex, other))
+    return csp
+
+
+# A planar map of rows x columns regions: a grid in which every square is
+# also split along a randomly chosen diagonal, so regions meet in triangles
+def region_map(rows: int, columns: int, seed: int = 0) -> Dict[int, List[int]]:
+    rng: random.Random = random.Random(seed)
+    adjacency: Dict[int, List[int]] = {r * columns + c: [] for r in range(rows) for c in range(columns)}
+
+    def border(a: int, b: int) -> None:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+
+    for r in range(rows):
+        for c in range(columns):
+            v: int = r * columns + c
+            if c + 1 < columns:
+                border(v, v + 1)
+            if r + 1 < rows:
+                border(v, v + columns)
+            if r + 1 < rows and c + 1 < columns:
+                if rng.random() < 0.5:
+                    border(v, v + columns + 1)
+                else:
+                    border(v + 1, v + columns)
+    return adjacency
+
+
+def is_proper_coloring(adjacency: Dict[V, List[V]], coloring: Dict[V, int], colors: int) -> bool:
+    return all(0 <= coloring[v] < colors and all(coloring[v] != coloring[u] for u in adjacent)
+               for v, adjacent in adjacency.items())
+
+
+class ColoringTimes(NamedTuple):
+    regions: int
+    dsatur: float  # seconds
+    csp: Optional[float]  # seconds, None when the generic CSP was skipped
+
+
+# Time dsatur_coloring, and the generic CSP when the map is small enough, on a region_map
+def benchmark(rows: int, columns: int, colors: int = 4, seed: int = 0, csp_limit: int = 900) -> ColoringTimes:
+    adjacency: Dict[int, List[int]] = region_map(rows, columns, seed)
+    start: float = time.perf_counter()
+    coloring: Optional[Dict[int, int]] = dsatur_coloring(adjacency, colors)
+    dsatur: float = time.perf_counter() - start
+    assert coloring is not None and is_proper_coloring(adjacency, coloring, colors)
+    generic: Optional[float] = None
+    if len(adjacency) <= csp_limit:
+        start = time.perf_counter()
+        solution: Optional[Dict[int, int]] = coloring_csp(adjacency, colors).backtracking_search(propagate=True)
+        generic = time.perf_counter() - start
+        assert solution is not None and is_proper_coloring(adjacency, solution, colors)
+    return ColoringTimes(len(adjacency), dsatur, generic)
+
 
 if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["benchmark"]:
+        # python map_coloring.py benchmark: DSATUR against the generic CSP (with MAC) on region maps
+        for rows, columns in [(10, 10), (20, 20), (30, 30), (100, 100), (300, 300)]:
+            times: ColoringTimes = benchmark(rows, columns)
+            generic: str = "skipped" if times.csp is None else f"{times.csp * 1000:.1f} ms"
+            print(f"{times.regions} regions, 4 colors: DSATUR {times.dsatur * 1000:.1f} ms, generic CSP {generic}")
+        sys.exit()
+
     variables: List[str] = ["Western Australia", "Northern Territory", "South Australia",
                             "Queensland", "New South Wales", "Victoria", "Tasmania"]
     domains: Dict[str, List[str]] = {}
@@ -56,4 +260,4 @@ if __name__ == "__main__":
     if solution is None:
         print("No solution found!")
     else:
-        print(solution)
\ No newline at end of file
+        print(solution)
@@ -14,13 +14,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from csp import Constraint, CSP
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Union
+
+
+# The queens on a line of the board: None, the column of a lone queen (the
+# common case, which a million-queen board cannot afford a list for), or a
+# list of the columns of two or more queens
+Line = Union[None, int, List[int]]
 
 
 class QueensConstraint(Constraint[int, int]):
     def __init__(self, columns: List[int]) -> None:
         super().__init__(columns)
         self.columns: List[int] = columns
+        # the queens on each row and diagonal, kept for local search
+        self.rows: List[Line] = []
+        self.diagonals: List[Line] = [] # indexed by row - column + n
+        self.antidiagonals: List[Line] = [] # indexed by row + column
+        self.free_rows: List[int] = [] # rows without a queen, in no particular order
+        self.free_position: List[int] = [] # index of each row in free_rows, or -1
 
     def satisfied(self, assignment: Dict[int, int]) -> bool:
         # q1c = queen 1 column, q1r = queen 1 row
@@ -35,6 +47,165 @@ class QueensConstraint(Constraint[int, int]):
                         return False
         return True # no conflict
 
+    def satisfied_incremental(self, assignment: Dict[int, int], last_variable: int, last_value: int) -> bool:
+        # only the newly placed queen can be attacked or attacking
+        for qc, qr in assignment.items():
+            if qc != last_variable:
+                if qr == last_value: # same row?
+                    return False
+                if abs(qr - last_value) == abs(qc - last_variable): # same diagonal?
+                    return False
+        return True # no conflict
+
+    def reset_conflicts(self) -> None:
+        n: int = len(self.columns)
+        self.rows = [None] * (n + 1)
+        self.diagonals = [None] * (2 * n + 1)
+        self.antidiagonals = [None] * (2 * n + 1)
+        self.free_rows = list(range(1, n + 1))
+        self.free_position = [-1] + list(range(n))
+
+    def conflicts(self, assignment: Dict[int, int], variable: int, value: int) -> int:
+        # queens sharing the row or a diagonal, not counting this one if it is already there
+        n: int = len(self.columns)
+        count: int = _line_size(self.rows[value]) + _line_size(self.diagonals[value - variable + n]) + \
+            _line_size(self.antidiagonals[value + variable])
+        return count - 3 if assignment.get(variable) == value else count
+
+    def conflicting(self, assignment: Dict[int, int], variable: int) -> List[int]:
+        n: int = len(self.columns)
+        value: int = assignment[variable]
+        return [qc for line in (self.rows[value], self.diagonals[value - variable + n],
+                                self.antidiagonals[value + variable])
+                if isinstance(line, list) for qc in line if qc != variable]
+
+    def moved(self, assignment: Dict[int, int], variable: int, old_value: Optional[int]) -> None:
+        n: int = len(self.columns)
+        if old_value is not None:
+            _line_remove(self.rows, old_value, variable)
+            if self.rows[old_value] is None:
+                self.free_position[old_value] = len(self.free_rows)
+                self.free_rows.append(old_value)
+            _line_remove(self.diagonals, old_value - variable + n, variable)
+            _line_remove(self.antidiagonals, old_value + variable, variable)
+        value: int = assignment[variable]
+        if self.rows[value] is None:
+            # swap the row to the end of free_rows and pop it
+            index: int = self.free_position[value]
+            last: int = self.free_rows.pop()
+            if last != value:
+                self.free_rows[index] = last
+                self.free_position[last] = index
+            self.free_position[value] = -1
+        _line_add(self.rows, value, variable)
+        _line_add(self.diagonals, value - variable + n, variable)
+        _line_add(self.antidiagonals, value + variable, variable)
+
+    def preferred_values(self, variable: int) -> List[int]:
+        return self.free_rows
+
+    def culprits(self, assignment: Dict[int, int], last_variable: int, last_value: int) -> Set[int]:
+        # the first placed queen attacking the newly placed one
+        for qc, qr in assignment.items():
+            if qc != last_variable and (qr == last_value or abs(qr - last_value) == abs(qc - last_variable)):
+                return {qc}
+        return set()
+
+
+def _line_size(line: Line) -> int:
+    if line is None:
+        return 0
+    return len(line) if isinstance(line, list) else 1
+
+
+def _line_add(lines: List[Line], index: int, column: int) -> None:
+    line: Line = lines[index]
+    if line is None:
+        lines[index] = column
+    elif isinstance(line, list):
+        line.append(column)
+    else:
+        lines[index] = [line, column]
+
+
+def _line_remove(lines: List[Line], index: int, column: int) -> None:
+    line: Line = lines[index]
+    if isinstance(line, list):
+        line.remove(column)
+        if len(line) == 1:
+            lines[index] = line[0]
+    else:
+        lines[index] = None
+
+
+# A specialized N-Queens engine over bitboards: queens are placed column by
+# column, and bit r - 1 of cols, left and right marks row r as attacked along
+# a row or one of the two diagonals. Shifting the diagonal masks by one moves
+# the attacks to the next column, so every node is a handful of integer ops.
+
+# Find the first solution in the same order as the CSP model (columns 1 to n,
+# rows tried from 1 up), so both give the same answer
+def queens_solution(n: int) -> Optional[Dict[int, int]]:
+    full: int = (1 << n) - 1
+    rows: List[int] = []
+
+    def place(cols: int, left: int, right: int) -> bool:
+        if cols == full:
+            return True
+        free: int = full & ~(cols | left | right)
+        while free:
+            bit: int = free & -free # lowest free row
+            free ^= bit
+            rows.append(bit.bit_length())
+            if place(cols | bit, ((left | bit) << 1) & full, (right | bit) >> 1):
+                return True
+            rows.pop()
+        return False
+
+    if n < 1 or not place(0, 0, 0):
+        return None
+    return {column: row for column, row in enumerate(rows, start=1)}
+
+
+# Count all solutions. A solution mirrored top to bottom is another solution,
+# so only the first queen's rows in the lower half are searched and doubled,
+# plus the middle row when n is odd.
+def count_queens_solutions(n: int) -> int:
+    if n < 1:
+        return 0
+    full: int = (1 << n) - 1
+
+    def count(cols: int, left: int, right: int, remaining: int) -> int:
+        free: int = full & ~(cols | left | right)
+        if remaining == 1:
+            return free.bit_count()
+        total: int = 0
+        if remaining == 2:
+            # the last two queens: count the rows left for the last one directly
+            while free:
+                bit: int = free & -free
+                free ^= bit
+                total += (full & ~(cols | bit | ((left | bit) << 1) | ((right | bit) >> 1))).bit_count()
+            return total
+        while free:
+            bit = free & -free
+            free ^= bit
+            # left can keep bits above the board, since free is masked with full
+            total += count(cols | bit, (left | bit) << 1, (right | bit) >> 1, remaining - 1)
+        return total
+
+    if n == 1:
+        return 1
+    total: int = 0
+    for row in range(n // 2):
+        bit: int = 1 << row
+        total += count(bit, bit << 1, bit >> 1, n - 1)
+    total *= 2
+    if n % 2:
+        bit = 1 << (n // 2)
+        total += count(bit, bit << 1, bit >> 1, n - 1)
+    return total
+
 
 if __name__ == "__main__":
     columns: List[int] = [1, 2, 3, 4, 5, 6, 7, 8]
@@ -47,4 +218,23 @@ if __name__ == "__main__":
     if solution is None:
         print("No solution found!")
     else:
-        print(solution)
\ No newline at end of file
+        print(solution)
+
+    # cross-check the CSP model against the bitboard engine
+    import time
+    print(queens_solution(8) == solution)
+    print(csp.count_solutions() == count_queens_solutions(8))
+    for n in range(4, 15):
+        start: float = time.perf_counter()
+        total: int = count_queens_solutions(n)
+        print(f"{n}-Queens: {total} solutions in {time.perf_counter() - start:.3f} s")
+
+    # min-conflicts local search on a board far too big for systematic search
+    n: int = 100_000
+    columns = list(range(1, n + 1))
+    csp = CSP(columns, {column: columns for column in columns}) # every column shares one domain list
+    csp.add_constraint(QueensConstraint(columns))
+    start = time.perf_counter()
+    solution = csp.min_conflicts(sample=64, seed=0)
+    print(f"{n}-Queens by min-conflicts: {'solved' if solution else 'not solved'} in {csp.stats.nodes} moves, "
+          f"{time.perf_counter() - start:.1f} s")
@@ -13,8 +13,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from csp import Constraint, CSP
-from typing import Dict, List, Optional
+from csp import AllDifferent, Constraint, CSP
+from typing import Dict, List, Optional, Tuple, Set
 
 
 class SendMoreMoneyConstraint(Constraint[str, int]):
@@ -43,6 +43,104 @@ class SendMoreMoneyConstraint(Constraint[str, int]):
             return send + more == money
         return True # no conflict
 
+    def satisfied_incremental(self, assignment: Dict[str, int], last_variable: str, last_value: int) -> bool:
+        # only the newly assigned letter can duplicate a digit
+        for letter, digit in assignment.items():
+            if digit == last_value and letter != last_variable:
+                return False
+        if len(assignment) == len(self.letters):
+            return self.satisfied(assignment)
+        return True # no conflict
+
+
+# Split "WORD + WORD (+ ...) = WORD" into the words being added and the result
+def parse_cryptarithm(expression: str) -> Tuple[List[str], str]:
+    sides: List[str] = expression.upper().split("=")
+    if len(sides) != 2:
+        raise ValueError(f"Expected exactly one '=' in {expression!r}")
+    addends: List[str] = [word.strip() for word in sides[0].split("+")]
+    result: str = sides[1].strip()
+    for word in addends + [result]:
+        if not word.isalpha() or not word.isascii():
+            raise ValueError(f"Not a word: {word!r} in {expression!r}")
+    if len(set("".join(addends) + result)) > 10:
+        raise ValueError(f"More than ten different letters in {expression!r}")
+    return addends, result
+
+
+# Ones column, tens column and so on: the sum of the addends restricted to the
+# lowest columns must equal the result in those columns, up to the carry out of
+# the highest of them. Each column gets one constraint over every letter in it
+# or to its right, so a wrong partial assignment fails as soon as those letters
+# are known instead of only once the whole sum is. When a single letter of the
+# column is left, it fails already if no unused digit can balance the column.
+class ColumnConstraint(Constraint[str, int]):
+    def __init__(self, addends: List[str], result: str, column: int, leading: Set[str] = set()) -> None:
+        # weight of each letter in the lowest column + 1 columns: positive for the
+        # addends and negative for the result, so a correct sum weighs 0
+        weights: Dict[str, int] = {}
+        for word, sign in [(word, 1) for word in addends] + [(result, -1)]:
+            for position, letter in enumerate(reversed(word[-(column + 1):])):
+                weights[letter] = weights.get(letter, 0) + sign * 10 ** position
+        super().__init__(list(weights))
+        self.weights: Dict[str, int] = weights
+        self.leading: Set[str] = leading # letters that cannot be 0
+        # the highest column must add up exactly, the others only modulo 10^(column + 1)
+        self.modulus: Optional[int] = None if column + 1 >= len(result) else 10 ** (column + 1)
+
+    def satisfied(self, assignment: Dict[str, int]) -> bool:
+        total: int = 0
+        missing: Optional[str] = None
+        for letter, weight in self.weights.items():
+            if letter in assignment:
+                total += weight * assignment[letter]
+            elif missing is None:
+                missing = letter
+            else:
+                return True # not yet possible to check this column
+        if missing is None:
+            return self.balanced(total)
+        used: Set[int] = set(assignment.values())
+        weight = self.weights[missing]
+        return any(self.balanced(total + weight * digit) for digit in range(1 if missing in self.leading else 0, 10)
+                   if digit not in used)
+
+    def balanced(self, total: int) -> bool:
+        if self.modulus is None:
+            return total == 0
+        return total % self.modulus == 0
+
+
+# No two letters may stand for the same digit
+class DistinctDigitsConstraint(AllDifferent[str, int]):
+    pass
+
+
+# Build the CSP of any "WORD + WORD (+ ...) = WORD" puzzle. Letters are ordered
+# from the ones column leftwards, which is what lets the column constraints
+# prune early, and leading letters cannot be 0.
+def cryptarithm_csp(expression: str) -> CSP[str, int]:
+    addends, result = parse_cryptarithm(expression)
+    words: List[str] = addends + [result]
+    if len(result) < max(len(word) for word in addends):
+        raise ValueError(f"The result is shorter than an addend in {expression!r}")
+    letters: List[str] = []
+    for column in range(len(result)):
+        for word in words:
+            if column < len(word) and word[-1 - column] not in letters:
+                letters.append(word[-1 - column])
+    leading: Set[str] = {word[0] for word in words if len(word) > 1}
+    domains: Dict[str, List[int]] = {letter: list(range(1 if letter in leading else 0, 10)) for letter in letters}
+    csp: CSP[str, int] = CSP(letters, domains)
+    csp.add_constraint(DistinctDigitsConstraint(letters))
+    for column in range(len(result)):
+        csp.add_constraint(ColumnConstraint(addends, result, column, leading))
+    return csp
+
+
+def solve_cryptarithm(expression: str) -> Optional[Dict[str, int]]:
+    return cryptarithm_csp(expression).backtracking_search()
+
 
 if __name__ == "__main__":
     letters: List[str] = ["S", "E", "N", "D", "M", "O", "R", "Y"]
@@ -56,4 +154,11 @@ if __name__ == "__main__":
     if solution is None:
         print("No solution found!")
     else:
-        print(solution)
\ No newline at end of file
+        print(solution)
+
+    import time
+    for expression in ["SEND + MORE = MONEY",
+                       "CROSS + ROADS = DANGER",
+                       "SO + MANY + MORE + MEN + SEEM + TO + SAY + THAT + THEY + MAY + SOON + TRY + TO + STAY + AT + HOME + SO + AS + TO + SEE + OR + HEAR + THE + SAME + ONE + MAN + TRY + TO + MEET + THE + TEAM + ON + THE + MOON + AS + HE + HAS + AT + THE + OTHER + TEN = TESTS"]:
+        start: float = time.perf_counter()
+        print(solve_cryptarithm(expression), f"{time.perf_counter() - start:.3f} s")
\ No newline at end of file
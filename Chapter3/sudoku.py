@@ -1,5 +1,5 @@
 # sudoku.py
-# This module contains functions and classes for generating and solving Sudoku puzzles. It includes functions to generate a Sudoku grid, display the grid, generate a domain for the Sudoku puzzle, and fill the grid with a given assignment. The module also uses the `CSP` and `Constraint` classes from the `csp` module to represent the Sudoku puzzle as a constraint satisfaction problem.
+# This module contains functions and classes for generating and solving Sudoku puzzles. It includes functions to generate a Sudoku grid, display the grid, generate a domain for the Sudoku puzzle, and fill the grid with a given assignment. The module also uses the `CSP` and `AllDifferent` classes from the `csp` module to represent the Sudoku puzzle as a constraint satisfaction problem.
 # Copyright 2018 Kyungwon Chun
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
@@ -14,11 +14,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import NamedTuple, List, Dict, Optional, Tuple
-from csp import CSP, Constraint
+from typing import NamedTuple, List, Dict, Optional, Tuple, Set, Iterator, Deque, TextIO
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from functools import lru_cache
+from itertools import chain
+from math import isqrt
+import random
+import time
+from csp import CSP, AllDifferent, first_unassigned, minimum_remaining_values
 
 Grid = List[List[int]]
 
+# Symbols of the one-line puzzle format: 1-9, then A for 10 up to P for 25
+SYMBOLS: str = "123456789ABCDEFGHIJKLMNOP"
+
 def generate_grid(rows: int = 9, columns: int = 9) -> Grid:
     """
     Generates a 2D grid of zeros with the specified number of rows and columns.
@@ -33,40 +44,107 @@ def generate_grid(rows: int = 9, columns: int = 9) -> Grid:
     return [[0 for _ in range(columns)] for _ in range(rows)]
 
 
+def box_size(grid: Grid) -> int:
+    """
+    Returns the box size n of an n²×n² Sudoku grid.
+
+    Raises:
+        ValueError: If the number of rows is not a perfect square.
+    """
+    box: int = isqrt(len(grid))
+    if box * box != len(grid):
+        raise ValueError(f"A Sudoku grid cannot have {len(grid)} rows")
+    return box
+
+
 def display_grid(grid: Grid) -> None:
     """
     Prints the given Sudoku grid to the console.
 
     Args:
-    - grid (List[List[int]]): a 9x9 Sudoku grid represented as a list of lists of integers
+    - grid (List[List[int]]): an n²×n² Sudoku grid represented as a list of lists of integers
 
     Returns: None
     """
+    box: int = box_size(grid)
+    width: int = len(str(len(grid)))
+    separator: str = "+".join(["-" * ((width + 1) * box + (0 if b in (0, box - 1) else 1))
+                               for b in range(box)])
     for i, row in enumerate(grid):
         for j, col in enumerate(row):
-            print(col, end=" ")
-            if j == 2 or j == 5:
+            print(str(col).rjust(width), end=" ")
+            if j % box == box - 1 and j != len(row) - 1:
                 print("|", end=" ")
         print()
-        if i == 2 or i == 5:
-            print("------+-------+------")
-        
+        if i % box == box - 1 and i != len(grid) - 1:
+            print(separator)
+
+
 
-def generate_domain() -> Dict[Tuple[int, int], List[int]]:
+def generate_domain(givens: Optional[Grid] = None, box: int = 3) -> Dict[Tuple[int, int], List[int]]:
     """
     Generates a domain for a Sudoku puzzle.
 
+    Args:
+        givens (Optional[Grid]): The clues of the puzzle, with 0 for the empty cells.
+            A given cell gets only its own digit, and an empty cell loses the digits
+            given elsewhere in its row, column or subgrid.
+        box (int): The size of a subgrid, used when there are no givens. Defaults to 3.
+
     Returns:
     A dictionary with keys as tuples representing the (row, column) of each cell in the puzzle,
     and values as lists of integers representing the possible values that can be assigned to each cell.
     """
+    if givens is not None:
+        box = box_size(givens)
+    size: int = box * box
     domain: Dict[Tuple[int, int], List[int]] = {}
-    for i in range(9):
-        for j in range(9):
-            domain[(i, j)] = list(range(1, 10))
+    for i in range(size):
+        for j in range(size):
+            if givens is None:
+                domain[(i, j)] = list(range(1, size + 1))
+            elif givens[i][j]:
+                domain[(i, j)] = [givens[i][j]]
+            else:
+                row, col = i - i % box, j - j % box
+                used: Set[int] = set(givens[i]) | {givens[r][j] for r in range(size)} | \
+                    {givens[r][c] for r in range(row, row + box) for c in range(col, col + box)}
+                domain[(i, j)] = [value for value in range(1, size + 1) if value not in used]
     return domain
 
 
+def parse_puzzle(line: str) -> Grid:
+    """
+    Parses a puzzle in the common one-line format: 81 characters in row-major
+    order, with a digit for each clue and 0 or . for each empty cell. Larger
+    puzzles use 256 or 625 characters, with A for 10 up to P for 25.
+
+    Args:
+        line (str): The puzzle. Surrounding whitespace is ignored.
+
+    Returns:
+        Grid: An n²×n² grid with 0 for the empty cells.
+
+    Raises:
+        ValueError: If the line is not a valid puzzle.
+    """
+    line = line.strip()
+    size: int = isqrt(len(line))
+    box: int = isqrt(size)
+    if size * size != len(line) or box * box != size or box < 2 or box > 5 or \
+            any(ch not in "0." and SYMBOLS.find(ch.upper()) not in range(size) for ch in line):
+        raise ValueError(f"Not a one-line Sudoku puzzle: {line!r}")
+    return [[0 if ch in "0." else SYMBOLS.index(ch.upper()) + 1 for ch in line[r * size:(r + 1) * size]]
+            for r in range(size)]
+
+
+def format_puzzle(grid: Grid) -> str:
+    """
+    Formats a grid as a single line, the inverse of parse_puzzle().
+    """
+    return "".join(SYMBOLS[value - 1] if value else "0" for row in grid for value in row)
+
+
 def fill_grid(grid: Grid, assignment: Dict[Tuple[int, int], List[int]]) -> Grid:
     """
     Fills the given Sudoku grid with the values in the given assignment.
@@ -93,24 +171,65 @@ def duplicate_in_list(l: List[int]) -> bool:
     Returns:
         True if there are duplicates, False otherwise.
     """
-    for i in range(1, 10):
-        if l.count(i) > 1:
+    values: List[int] = [value for value in l if value]
+    return len(set(values)) < len(values)
+
+
+def duplicate_in_cells(cells: List[Tuple[int, int]], assignment: Dict[Tuple[int, int], int]) -> bool:
+    """
+    Check if any value is assigned to more than one of the given cells.
+
+    Args:
+        cells: The cells of a row, column or subgrid.
+        assignment: The current assignment.
+
+    Returns:
+        True if there are duplicates, False otherwise.
+    """
+    seen: int = 0
+    for cell in cells:
+        value: Optional[int] = assignment.get(cell)
+        if value is not None:
+            bit: int = 1 << value
+            if seen & bit:
+                return True
+            seen |= bit
+    return False
+
+
+def repeats_value(cells: List[Tuple[int, int]], assignment: Dict[Tuple[int, int], int],
+                  last_cell: Tuple[int, int], last_value: int) -> bool:
+    """
+    Check if a newly assigned cell repeats the value of another cell in the same unit.
+
+    Args:
+        cells: The cells of a row, column or subgrid.
+        assignment: The current assignment.
+        last_cell: The cell that was assigned last.
+        last_value: The value assigned to last_cell.
+
+    Returns:
+        True if another cell of the unit holds last_value, False otherwise.
+    """
+    for cell in cells:
+        if cell != last_cell and assignment.get(cell) == last_value:
             return True
     return False
 
 
-class SodukoRowConstraint(Constraint[Tuple[int, int], int]):
+class SodukoRowConstraint(AllDifferent[Tuple[int, int], int]):
     """
-    A constraint for a Sudoku row.
+    A constraint for a Sudoku row. Propagation filters it as an AllDifferent.
 
     Args:
     row (int): The row number.
+    size (int): The number of cells in the row. Defaults to 9.
 
     Attributes:
     row (int): The row number.
     """
-    def __init__(self, row: int) -> None:
-        pos: List[Tuple[int, int]] = [(row, i) for i in range(9)]
+    def __init__(self, row: int, size: int = 9) -> None:
+        pos: List[Tuple[int, int]] = [(row, i) for i in range(size)]
         super().__init__(pos)
         self.row: int = row
         
@@ -124,15 +243,28 @@ class SodukoRowConstraint(Constraint[Tuple[int, int], int]):
         Returns:
         bool: True if the constraint is satisfied, False otherwise.
         """
-        grid = fill_grid(generate_grid(), assignment)
-        if duplicate_in_list(grid[self.row]):
-            return False
-        return True
+        return not duplicate_in_cells(self.variables, assignment)
 
+    def satisfied_incremental(self, assignment: Dict[Tuple[int, int], int], last_variable: Tuple[int, int],
+                              last_value: int) -> bool:
+        """
+        Check only whether the newly assigned cell repeats a value in the row.
+
+        Args:
+        assignment (Dict[Tuple[int, int], int]): The current assignment.
+        last_variable (Tuple[int, int]): The cell that was assigned last.
+        last_value (int): The value assigned to that cell.
 
-class SodukoColumnConstraint(Constraint[Tuple[int, int], int]):
+        Returns:
+        bool: True if the constraint is satisfied, False otherwise.
+        """
+        return not repeats_value(self.variables, assignment, last_variable, last_value)
+
+
+class SodukoColumnConstraint(AllDifferent[Tuple[int, int], int]):
     """
     A constraint for a Sudoku puzzle that checks if a column has any duplicate values.
+    Propagation filters it as an AllDifferent.
 
     Attributes:
     -----------
@@ -140,7 +272,7 @@ class SodukoColumnConstraint(Constraint[Tuple[int, int], int]):
         The column number to check for duplicates.
     """
 
-    def __init__(self, column: int) -> None:
+    def __init__(self, column: int, size: int = 9) -> None:
         """
         Initializes the constraint with the given column number.
 
@@ -148,8 +280,10 @@ class SodukoColumnConstraint(Constraint[Tuple[int, int], int]):
         -----------
         column : int
             The column number to check for duplicates.
+        size : int
+            The number of cells in the column. Defaults to 9.
         """
-        pos: List[Tuple[int, int]] = [(i, column) for i in range(9)]
+        pos: List[Tuple[int, int]] = [(i, column) for i in range(size)]
         super().__init__(pos)
         self.col: int = column
 
@@ -167,18 +301,37 @@ class SodukoColumnConstraint(Constraint[Tuple[int, int], int]):
         bool
             True if the constraint is satisfied, False otherwise.
         """
-        grid = fill_grid(generate_grid(), assignment)
-        if duplicate_in_list([grid[i][self.col] for i in range(9)]):
-            return False
-        return True
+        return not duplicate_in_cells(self.variables, assignment)
 
+    def satisfied_incremental(self, assignment: Dict[Tuple[int, int], int], last_variable: Tuple[int, int],
+                              last_value: int) -> bool:
+        """
+        Checks only whether the newly assigned cell repeats a value in the column.
+
+        Parameters:
+        -----------
+        assignment : Dict[Tuple[int, int], int]
+            The current assignment of values to positions in the Sudoku grid.
+        last_variable : Tuple[int, int]
+            The position that was assigned last.
+        last_value : int
+            The value assigned to that position.
 
-class SodukoSubgridConstraint(Constraint[Tuple[int, int], int]):
+        Returns:
+        --------
+        bool
+            True if the constraint is satisfied, False otherwise.
+        """
+        return not repeats_value(self.variables, assignment, last_variable, last_value)
+
+
+class SodukoSubgridConstraint(AllDifferent[Tuple[int, int], int]):
     """
-    A constraint for a Sudoku subgrid.
+    A constraint for a Sudoku subgrid. Propagation filters it as an AllDifferent.
 
     Args:
     cell (Tuple[int, int]): The top-left cell of the subgrid.
+    box (int): The number of rows and columns of the subgrid. Defaults to 3.
 
     Attributes:
     loc (Tuple[int, int]): The top-left cell of the subgrid.
@@ -187,8 +340,8 @@ class SodukoSubgridConstraint(Constraint[Tuple[int, int], int]):
     satisfied(assignment: Dict[Tuple[int, int], int]) -> bool:
         Returns True if the subgrid constraint is satisfied, False otherwise.
     """
-    def __init__(self, cell: Tuple[int, int]) -> None:
-        pos: List[Tuple[int, int]] = [(i, j) for i in range(cell[0], cell[0] + 3) for j in range(cell[1], cell[1] + 3)]
+    def __init__(self, cell: Tuple[int, int], box: int = 3) -> None:
+        pos: List[Tuple[int, int]] = [(i, j) for i in range(cell[0], cell[0] + box) for j in range(cell[1], cell[1] + box)]
         super().__init__(pos)
         self.loc: Tuple[int, int] = cell
 
@@ -202,34 +355,521 @@ class SodukoSubgridConstraint(Constraint[Tuple[int, int], int]):
         Returns:
         bool: True if the subgrid constraint is satisfied, False otherwise.
         """
-        grid = fill_grid(generate_grid(), assignment)
-        
-        row: int
-        col: int
-        row, col = self.loc
-        subgrid = [grid[i][j] for i in range(row, row + 3) for j in range(col, col + 3)]
-        if duplicate_in_list(subgrid):
+        return not duplicate_in_cells(self.variables, assignment)
+
+    def satisfied_incremental(self, assignment: Dict[Tuple[int, int], int], last_variable: Tuple[int, int],
+                              last_value: int) -> bool:
+        """
+        Returns True if the newly assigned cell does not repeat a value in the subgrid.
+
+        Args:
+        assignment (Dict[Tuple[int, int], int]): A dictionary of cell-value assignments.
+        last_variable (Tuple[int, int]): The cell that was assigned last.
+        last_value (int): The value assigned to that cell.
+
+        Returns:
+        bool: True if the subgrid constraint is satisfied, False otherwise.
+        """
+        return not repeats_value(self.variables, assignment, last_variable, last_value)
+
+
+def sudoku_csp(givens: Optional[Grid] = None, box: int = 3) -> CSP[Tuple[int, int], int]:
+    """
+    Builds the CSP of a Sudoku puzzle, with a row, column and subgrid constraint per unit.
+
+    Args:
+        givens (Optional[Grid]): The clues of the puzzle, with 0 for the empty cells.
+        box (int): The size of a subgrid, used when there are no givens. Defaults to 3.
+
+    Returns:
+    A CSP over the (row, column) cells that picks the cell with the fewest values left first,
+    meant to be solved with propagate=True so that every unit is filtered as an AllDifferent.
+    """
+    if givens is not None:
+        box = box_size(givens)
+    size: int = box * box
+    domains: Dict[Tuple[int, int], List[int]] = generate_domain(givens, box)
+    csp: CSP[Tuple[int, int], int] = CSP(list(domains), domains, select_variable=minimum_remaining_values)
+    for i in range(size):
+        csp.add_constraint(SodukoRowConstraint(i, size))
+        csp.add_constraint(SodukoColumnConstraint(i, size))
+    for i in range(0, size, box):
+        for j in range(0, size, box):
+            csp.add_constraint(SodukoSubgridConstraint((i, j), box))
+    return csp
+
+
+class SudokuTables(NamedTuple):
+    """
+    Index tables of an n²×n² grid whose cells are numbered in row-major order.
+
+    Attributes:
+        box (int): The size n of a box.
+        size (int): The number of rows, columns, boxes and digits, n².
+        all_digits (int): The mask with one bit per digit; bit d - 1 stands for digit d.
+        cell_row (List[int]): The row of each cell.
+        cell_column (List[int]): The column of each cell.
+        cell_box (List[int]): The box of each cell.
+        units (List[List[int]]): The cells of every row, column and box.
+    """
+    box: int
+    size: int
+    all_digits: int
+    cell_row: List[int]
+    cell_column: List[int]
+    cell_box: List[int]
+    units: List[List[int]]
+
+
+@lru_cache(maxsize=None)
+def sudoku_tables(box: int) -> SudokuTables:
+    """
+    Builds (once per box size) the index tables used by BitmaskSudoku.
+    """
+    size: int = box * box
+    cells: range = range(size * size)
+    cell_row: List[int] = [i // size for i in cells]
+    cell_column: List[int] = [i % size for i in cells]
+    cell_box: List[int] = [(i // size) // box * box + (i % size) // box for i in cells]
+    units: List[List[int]] = [[r * size + c for c in range(size)] for r in range(size)] + \
+                             [[r * size + c for r in range(size)] for c in range(size)] + \
+                             [[i for i in cells if cell_box[i] == b] for b in range(size)]
+    return SudokuTables(box, size, (1 << size) - 1, cell_row, cell_column, cell_box, units)
+
+
+# Guesses BitmaskSudoku makes before its first restart
+RESTART_GUESSES: int = 1000
+
+
+class _GuessLimitReached(Exception):
+    pass
+
+
+class BitmaskSudoku:
+    """
+    A dedicated Sudoku solver that keeps, for every row, column and box, a mask
+    of the digits already used there. Placing a digit is O(1), and the
+    candidates of a cell are the digits missing from all three of its masks.
+
+    The search fills naked singles (cells with one candidate) and hidden singles
+    (digits with one possible cell in a unit) before it guesses, always guessing
+    on the cell with the fewest candidates. Any n²×n² grid is supported: the
+    masks have n² bits, which is 9 bits for the classic 9x9 puzzle.
+
+    Args:
+        grid (Grid): An n²×n² grid with 0 for the empty cells.
+
+    Attributes:
+        cells (List[int]): The cells in row-major order, 0 when empty.
+        guesses (int): The number of guesses made by the last call to solve().
+    """
+    def __init__(self, grid: Grid) -> None:
+        self.tables: SudokuTables = sudoku_tables(box_size(grid))
+        size: int = self.tables.size
+        self.cells: List[int] = [0] * (size * size)
+        self.rows: List[int] = [0] * size
+        self.columns: List[int] = [0] * size
+        self.boxes: List[int] = [0] * size
+        self.guesses: int = 0
+        self._guess_limit: int = RESTART_GUESSES
+        self._rng: Optional[random.Random] = None
+        self._valid: bool = True
+        for i in range(size * size):
+            digit: int = grid[i // size][i % size]
+            if digit and not self.place(i, digit):
+                self._valid = False  # the givens contradict each other
+
+    def candidates(self, i: int) -> int:
+        """
+        Returns the mask of the digits that can still be placed in cell i.
+        """
+        tables: SudokuTables = self.tables
+        return tables.all_digits & ~(self.rows[tables.cell_row[i]] | self.columns[tables.cell_column[i]] |
+                                     self.boxes[tables.cell_box[i]])
+
+    def place(self, i: int, digit: int) -> bool:
+        """
+        Places a digit in cell i and updates the masks of its row, column and box.
+
+        Returns:
+            bool: False, leaving the grid unchanged, if the digit is already used
+            in the row, column or box of the cell.
+        """
+        bit: int = 1 << (digit - 1)
+        row: int = self.tables.cell_row[i]
+        column: int = self.tables.cell_column[i]
+        box: int = self.tables.cell_box[i]
+        if (self.rows[row] | self.columns[column] | self.boxes[box]) & bit:
             return False
+        self.rows[row] |= bit
+        self.columns[column] |= bit
+        self.boxes[box] |= bit
+        self.cells[i] = digit
         return True
 
+    def solve(self, seed: int = 0) -> Optional[Grid]:
+        """
+        Solves the puzzle.
 
-if __name__ == "__main__":
-    grid: Grid = generate_grid()
-    domains = generate_domain()
-    variables = list(domains.keys())
-    csp: CSP[Tuple[int, int], int] = CSP(variables, domains)
+        A search that makes more than RESTART_GUESSES guesses is restarted with
+        the candidates tried in a random order and twice the budget. This cuts
+        off the rare runs where an early wrong guess is very expensive to refute,
+        which happens mostly on 16x16 and 25x25 grids. The budget keeps doubling,
+        so the search is still complete.
+
+        Args:
+            seed (int): The seed of the random orders used after a restart.
+
+        Returns:
+            Optional[Grid]: The solved grid, or None if the puzzle has no solution.
+        """
+        self.guesses = 0
+        if not self._valid:
+            return None
+        start: Tuple[List[int], List[int], List[int], List[int]] = \
+            (self.cells[:], self.rows[:], self.columns[:], self.boxes[:])
+        budget: int = RESTART_GUESSES
+        self._rng = None
+        while True:
+            self._guess_limit = self.guesses + budget
+            try:
+                solved: bool = self._search()
+                break
+            except _GuessLimitReached:
+                self.cells, self.rows, self.columns, self.boxes = \
+                    start[0][:], start[1][:], start[2][:], start[3][:]
+                budget *= 2
+                self._rng = random.Random(seed + budget)
+        if not solved:
+            return None
+        size: int = self.tables.size
+        return [self.cells[r * size:(r + 1) * size] for r in range(size)]
+
+    def _search(self) -> bool:
+        if not self._propagate():
+            return False
+        # guess on the empty cell with the fewest candidates
+        all_digits, cell_row, cell_column, cell_box = \
+            self.tables.all_digits, self.tables.cell_row, self.tables.cell_column, self.tables.cell_box
+        cells, rows, columns, boxes = self.cells, self.rows, self.columns, self.boxes
+        best: int = -1
+        best_count: int = self.tables.size + 1
+        # after a restart, ties are broken at random by starting the scan anywhere
+        offset: int = 0 if self._rng is None else self._rng.randrange(len(cells))
+        for i in chain(range(offset, len(cells)), range(offset)):
+            if not cells[i]:
+                count: int = (all_digits & ~(rows[cell_row[i]] | columns[cell_column[i]] | boxes[cell_box[i]])).bit_count()
+                if count < best_count:
+                    best, best_count = i, count
+                    if count == 2:
+                        break  # singles were already filled, so two is the minimum
+        if best < 0:
+            return True  # no empty cell left
+        candidates: int = self.candidates(best)
+        choices: List[Tuple[int, int]] = []
+        while candidates:
+            bit: int = candidates & -candidates
+            candidates ^= bit
+            choices.append((best, bit.bit_length()))
+        if best_count > 2:
+            # on large grids a digit with only two places left in some unit is
+            # often a better guess than any cell
+            choices = self._digit_with_two_places() or choices
+        if self._rng is not None:
+            self._rng.shuffle(choices)
+        saved: Tuple[List[int], List[int], List[int], List[int]] = \
+            (self.cells[:], self.rows[:], self.columns[:], self.boxes[:])
+        for i, digit in choices:
+            self.guesses += 1
+            if self.guesses > self._guess_limit:
+                raise _GuessLimitReached()
+            self.place(i, digit)
+            if self._search():
+                return True
+            self.cells, self.rows, self.columns, self.boxes = \
+                saved[0][:], saved[1][:], saved[2][:], saved[3][:]
+        return False
+
+    def _digit_with_two_places(self) -> List[Tuple[int, int]]:
+        all_digits, cell_row, cell_column, cell_box = \
+            self.tables.all_digits, self.tables.cell_row, self.tables.cell_column, self.tables.cell_box
+        cells, rows, columns, boxes = self.cells, self.rows, self.columns, self.boxes
+        units: List[List[int]] = self.tables.units
+        offset: int = 0 if self._rng is None else self._rng.randrange(len(units))
+        for unit in chain(units[offset:], units[:offset]):
+            # count the places of every digit up to three, one bit per digit
+            once: int = 0
+            twice: int = 0
+            thrice: int = 0
+            for i in unit:
+                if not cells[i]:
+                    candidates: int = all_digits & ~(rows[cell_row[i]] | columns[cell_column[i]] | boxes[cell_box[i]])
+                    thrice |= twice & candidates
+                    twice |= once & candidates
+                    once |= candidates
+            pairs: int = twice & ~thrice
+            if pairs:
+                bit: int = pairs & -pairs
+                return [(i, bit.bit_length()) for i in unit if not cells[i] and self.candidates(i) & bit]
+        return []
+
+    def _propagate(self) -> bool:
+        all_digits, cell_row, cell_column, cell_box = \
+            self.tables.all_digits, self.tables.cell_row, self.tables.cell_column, self.tables.cell_box
+        cells, rows, columns, boxes = self.cells, self.rows, self.columns, self.boxes
+        changed: bool = True
+        while changed:
+            changed = False
+            # naked singles: a cell with only one candidate
+            for i in range(len(cells)):
+                if not cells[i]:
+                    candidates: int = all_digits & ~(rows[cell_row[i]] | columns[cell_column[i]] | boxes[cell_box[i]])
+                    if not candidates:
+                        return False
+                    if not candidates & (candidates - 1):
+                        self.place(i, candidates.bit_length())
+                        changed = True
+            # hidden singles: a digit with only one possible cell in a unit
+            for unit in self.tables.units:
+                once: int = 0
+                twice: int = 0
+                used: int = 0
+                for i in unit:
+                    if cells[i]:
+                        used |= 1 << (cells[i] - 1)
+                    else:
+                        candidates = all_digits & ~(rows[cell_row[i]] | columns[cell_column[i]] | boxes[cell_box[i]])
+                        twice |= once & candidates
+                        once |= candidates
+                if once | used != all_digits:
+                    return False  # some digit fits nowhere in this unit
+                unique: int = once & ~twice
+                while unique:
+                    bit: int = unique & -unique
+                    unique ^= bit
+                    for i in unit:
+                        if not cells[i] and self.candidates(i) & bit:
+                            self.place(i, bit.bit_length())
+                            changed = True
+                            break
+        return True
+
+
+def solve_puzzle(line: str) -> Tuple[Optional[str], float]:
+    """
+    Solves a one-line puzzle with the bitmask engine.
+
+    Args:
+        line (str): The puzzle in the format read by parse_puzzle().
+
+    Returns:
+        Tuple[Optional[str], float]: The solution in the same format, or None if there
+        is no solution, and the time spent solving in seconds.
+    """
+    start: float = time.perf_counter()
+    solution: Optional[Grid] = BitmaskSudoku(parse_puzzle(line)).solve()
+    elapsed: float = time.perf_counter() - start
+    return (None if solution is None else format_puzzle(solution)), elapsed
+
+
+def _solve_chunk(lines: List[str]) -> List[Tuple[Optional[str], float]]:
+    return [solve_puzzle(line) for line in lines]
+
+
+class BatchStats(NamedTuple):
+    """
+    Throughput of a batch solve.
+
+    Attributes:
+        puzzles (int): The number of puzzles read.
+        solved (int): The number of puzzles that had a solution.
+        seconds (float): The wall time of the whole batch.
+        p50 (float): The median solve time of a single puzzle, in seconds.
+        p99 (float): The 99th percentile solve time of a single puzzle, in seconds.
+    """
+    puzzles: int
+    solved: int
+    seconds: float
+    p50: float
+    p99: float
+
+    @property
+    def puzzles_per_second(self) -> float:
+        return self.puzzles / self.seconds if self.seconds > 0 else 0.0
 
-    for i in range(9):
-        csp.add_constraint(SodukoRowConstraint(i))
-        csp.add_constraint(SodukoColumnConstraint(i))
-    for i in range(0, 9, 3):
-        for j in range(0, 9, 3):
-            csp.add_constraint(SodukoSubgridConstraint((i, j)))
 
+def solve_file(input_path: str, output_path: str, workers: Optional[int] = None, chunk_size: int = 256) -> BatchStats:
+    """
+    Solves every puzzle of a file with one puzzle per line and writes the solutions,
+    one per line and in the same order, to another file. Puzzles without a solution
+    are written as "No solution found!". Blank lines are skipped.
+
+    The input is streamed: only a bounded number of chunks of puzzles are in flight
+    at any time, so the file is never loaded as a whole.
+
+    Args:
+        input_path (str): The file to read the puzzles from.
+        output_path (str): The file to write the solutions to.
+        workers (Optional[int]): The number of worker processes. With None or 1, the
+            puzzles are solved in this process.
+        chunk_size (int): The number of puzzles sent to a worker at a time.
+
+    Returns:
+        BatchStats: The number of puzzles, the wall time and the solve time percentiles.
+    """
+    times: array = array("d")  # one solve time per puzzle, 8 bytes each
+    solved: int = 0
+    start: float = time.perf_counter()
+    with open(input_path) as source, open(output_path, "w") as target:
+        chunks: Iterator[List[str]] = _read_chunks(source, chunk_size)
+        if workers is None or workers == 1:
+            results: Iterator[List[Tuple[Optional[str], float]]] = map(_solve_chunk, chunks)
+        else:
+            results = _solve_chunks_in_pool(chunks, workers)
+        for chunk in results:
+            for solution, elapsed in chunk:
+                times.append(elapsed)
+                if solution is None:
+                    target.write("No solution found!\n")
+                else:
+                    solved += 1
+                    target.write(solution + "\n")
+    seconds: float = time.perf_counter() - start
+    ordered: List[float] = sorted(times)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+    return BatchStats(len(times), solved, seconds, percentile(0.5), percentile(0.99))
+
+
+def generate_puzzle(box: int, holes: float, rng: random.Random) -> Grid:
+    """
+    Generates a random n²×n² puzzle by shuffling the digits, rows and columns of
+    a patterned solution and then emptying a fraction of its cells. The puzzle
+    always has a solution, but not necessarily a unique one.
+
+    Args:
+        box (int): The size n of a box.
+        holes (float): The fraction of cells to empty.
+        rng (random.Random): The source of randomness.
+
+    Returns:
+        Grid: The puzzle, with 0 for the empty cells.
+    """
+    size: int = box * box
+    digits: List[int] = list(range(1, size + 1))
+    rng.shuffle(digits)
+    # shuffle the bands and the rows within each band, and the same for columns
+    rows: List[int] = [band * box + r for band in rng.sample(range(box), box) for r in rng.sample(range(box), box)]
+    columns: List[int] = [stack * box + c for stack in rng.sample(range(box), box) for c in rng.sample(range(box), box)]
+    grid: Grid = [[digits[(box * (r % box) + r // box + c) % size] for c in columns] for r in rows]
+    for i in rng.sample(range(size * size), int(holes * size * size)):
+        grid[i // size][i % size] = 0
+    return grid
+
+
+def benchmark(box: int, puzzles: int = 20, holes: float = 0.6, seed: int = 0) -> BatchStats:
+    """
+    Times BitmaskSudoku on generated n²×n² puzzles.
+
+    Args:
+        box (int): The size n of a box.
+        puzzles (int): The number of puzzles to solve.
+        holes (float): The fraction of empty cells in each puzzle.
+        seed (int): The seed of the puzzle generator.
+
+    Returns:
+        BatchStats: The number of puzzles, the wall time and the solve time percentiles.
+    """
+    rng: random.Random = random.Random(seed)
+    grids: List[Grid] = [generate_puzzle(box, holes, rng) for _ in range(puzzles)]
+    times: List[float] = []
+    solved: int = 0
+    start: float = time.perf_counter()
+    for grid in grids:
+        begin: float = time.perf_counter()
+        if BitmaskSudoku(grid).solve() is not None:
+            solved += 1
+        times.append(time.perf_counter() - begin)
+    seconds: float = time.perf_counter() - start
+    times.sort()
+    return BatchStats(puzzles, solved, seconds, times[len(times) // 2], times[min(len(times) - 1, int(0.99 * len(times)))])
+
+
+def _read_chunks(source: TextIO, chunk_size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for line in source:
+        if line.strip():
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _solve_chunks_in_pool(chunks: Iterator[List[str]], workers: int) -> Iterator[List[Tuple[Optional[str], float]]]:
+    # keep a few chunks per worker in flight and hand the results back in order
+    in_flight: Deque[Future] = deque()
+    with ProcessPoolExecutor(workers) as executor:
+        for chunk in chunks:
+            in_flight.append(executor.submit(_solve_chunk, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["benchmark"]:
+        # python sudoku.py benchmark: the bitmask engine on 9x9, 16x16 and 25x25 grids
+        for box, holes in [(3, 0.7), (4, 0.65), (5, 0.5)]:
+            stats = benchmark(box, 10, holes)
+            print(f"{box * box}x{box * box}, {holes:.0%} empty: {stats.puzzles_per_second:.1f} puzzles/s, "
+                  f"p50 {stats.p50 * 1000:.1f} ms, p99 {stats.p99 * 1000:.1f} ms")
+        sys.exit()
+    if len(sys.argv) > 2:
+        # batch mode: python sudoku.py puzzles.txt solutions.txt [workers]
+        stats: BatchStats = solve_file(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+        print(f"{stats.solved}/{stats.puzzles} puzzles solved in {stats.seconds:.2f} s "
+              f"({stats.puzzles_per_second:.0f} puzzles/s, "
+              f"p50 {stats.p50 * 1000:.3f} ms, p99 {stats.p99 * 1000:.3f} ms)")
+        sys.exit()
+
+    grid: Grid = generate_grid()
+    csp: CSP[Tuple[int, int], int] = sudoku_csp()
+    csp.select_variable = first_unassigned
     solution: Optional[Dict[Tuple[int, int], int]] = csp.backtracking_search()
 
     if solution is None:
         print("No solution found!")
     else:
         display_grid(fill_grid(grid, solution))
+    print()
+
+    # a puzzle with givens, first with the CSP and AllDifferent propagation,
+    # then with the bitmask engine
+    puzzle: str = "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......"
+    givens: Grid = parse_puzzle(puzzle)
+    start: float = time.perf_counter()
+    csp = sudoku_csp(givens)
+    solution = csp.backtracking_search(propagate=True)
+    elapsed: float = time.perf_counter() - start
+    if solution is None:
+        print("No solution found!")
+    else:
+        display_grid(fill_grid(generate_grid(), solution))
+    print(f"CSP with AllDifferent: {elapsed * 1000:.2f} ms, {csp.stats.nodes} nodes")
+    print()
+
+    start = time.perf_counter()
+    solver: BitmaskSudoku = BitmaskSudoku(givens)
+    solved: Optional[Grid] = solver.solve()
+    elapsed = time.perf_counter() - start
+    if solved is None:
+        print("No solution found!")
+    else:
+        display_grid(solved)
+    print(f"Bitmask solver: {elapsed * 1000:.2f} ms, {solver.guesses} guesses")
 
@@ -16,6 +16,8 @@
 
 import unittest
 from circuit_board import generate_domain, generate_grid, Chip, ChipSearchConstraint, GridLocation
+from circuit_board import ChipMaskConstraint, generate_mask_domain, layout_chips, mask_locations
+from csp import CSP
 
 
 class TestCircuitBoard(unittest.TestCase):
@@ -41,6 +43,62 @@ class TestCircuitBoard(unittest.TestCase):
                       chip2: [GridLocation(0, 1), GridLocation(1, 1)]}
         self.assertTrue(constraint.satisfied(assignment))
 
+    def test_chip_search_constraint_incremental(self):
+        chip1 = Chip(1, 1)
+        chip2 = Chip(2, 1)
+        constraint = ChipSearchConstraint([chip1, chip2])
+        location = [GridLocation(0, 0), GridLocation(1, 0)]
+        assignment = {chip1: [GridLocation(0, 0)], chip2: location}
+        self.assertFalse(constraint.satisfied_incremental(assignment, chip2, location))
+
+        location = [GridLocation(0, 1), GridLocation(1, 1)]
+        assignment = {chip1: [GridLocation(0, 0)], chip2: location}
+        self.assertTrue(constraint.satisfied_incremental(assignment, chip2, location))
+
+    def test_generate_mask_domain(self):
+        chip = Chip(2, 1)
+        grid = generate_grid(3, 2)
+        domain = generate_mask_domain(chip, 3, 2)
+        self.assertCountEqual([sorted(mask_locations(mask, 2)) for mask in domain],
+                              [sorted(locations) for locations in generate_domain(chip, grid)])
+
+    def test_chip_mask_constraint(self):
+        chip1 = Chip(1, 1)
+        chip2 = Chip(2, 1)
+        constraint = ChipMaskConstraint([chip1, chip2])
+        self.assertFalse(constraint.satisfied({chip1: 0b01, chip2: 0b101}))
+        self.assertFalse(constraint.satisfied_incremental({chip1: 0b01, chip2: 0b101}, chip2, 0b101))
+        self.assertTrue(constraint.satisfied({chip1: 0b01, chip2: 0b1010}))
+        self.assertTrue(constraint.satisfied_incremental({chip1: 0b01, chip2: 0b1010}, chip2, 0b1010))
+        self.assertEqual(constraint.culprits({chip1: 0b01, chip2: 0b101}, chip2, 0b101), {chip1})
+
+    def test_layout_chips(self):
+        chips = [Chip(6, 1), Chip(4, 4), Chip(3, 3), Chip(2, 2), Chip(2, 5)]
+        solution = layout_chips(chips, 9, 9)
+        self.assertEqual(set(solution), set(chips))
+        occupied = 0
+        for chip, mask in solution.items():
+            self.assertEqual(occupied & mask, 0)
+            self.assertEqual(mask.bit_count(), chip.height * chip.width)
+            occupied |= mask
+
+        csp = CSP(chips, {chip: generate_mask_domain(chip, 9, 9) for chip in chips})
+        csp.add_constraint(ChipMaskConstraint(chips))
+        self.assertTrue(csp.backtracking_search(propagate=True))
+
+    def test_layout_chips_impossible(self):
+        self.assertIsNone(layout_chips([Chip(2, 2), Chip(1, 3), Chip(3, 1)], 3, 3))
+        self.assertIsNone(layout_chips([Chip(2, 2), Chip(1, 2)], 2, 3))
+
+    def test_layout_chips_large_board(self):
+        chips = [Chip(height, width) for height in range(2, 9) for width in range(3, 8)]
+        solution = layout_chips(chips, 40, 40)
+        self.assertEqual(len(solution), len(chips))
+        occupied = 0
+        for mask in solution.values():
+            self.assertEqual(occupied & mask, 0)
+            occupied |= mask
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,477 @@
+# tests_csp.py
+# unit test of csp.py
+# Copyright 2023 Kyungwon Chun
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import pickle
+import random
+import unittest
+from unittest.mock import patch
+
+from csp import CSP, Constraint, SearchStatus, TableConstraint, AllDifferent
+from csp import minimum_remaining_values, least_constraining_value
+from map_coloring import MapColoringConstraint
+from queens import QueensConstraint
+
+
+def australia(colors):
+    variables = ["Western Australia", "Northern Territory", "South Australia",
+                 "Queensland", "New South Wales", "Victoria", "Tasmania"]
+    csp = CSP(variables, {variable: list(colors) for variable in variables})
+    for place1, place2 in [("Western Australia", "Northern Territory"),
+                           ("Western Australia", "South Australia"),
+                           ("South Australia", "Northern Territory"),
+                           ("Queensland", "Northern Territory"),
+                           ("Queensland", "South Australia"),
+                           ("Queensland", "New South Wales"),
+                           ("New South Wales", "South Australia"),
+                           ("Victoria", "South Australia"),
+                           ("Victoria", "New South Wales"),
+                           ("Victoria", "Tasmania")]:
+        csp.add_constraint(MapColoringConstraint(place1, place2))
+    return csp
+
+
+def queens(n):
+    columns = list(range(1, n + 1))
+    csp = CSP(columns, {column: list(range(1, n + 1)) for column in columns})
+    csp.add_constraint(QueensConstraint(columns))
+    return csp
+
+
+class Forbidden(Constraint):
+    # the variables may not take these values together
+    def __init__(self, values):
+        super().__init__(list(values))
+        self.values = values
+
+    def satisfied(self, assignment):
+        return any(assignment.get(v, value) != value for v, value in self.values.items()) or \
+            not all(v in assignment for v in self.values)
+
+
+def is_solution(csp, solution):
+    return len(solution) == len(csp.variables) and \
+        all(csp.consistent(variable, solution) for variable in csp.variables)
+
+
+class TestArcConsistency(unittest.TestCase):
+    def test_ac3_prunes_neighbors_of_fixed_variable(self):
+        csp = australia(["red", "green", "blue"])
+        domains = {v: list(values) for v, values in csp.domains.items()}
+        domains["South Australia"] = ["red"]
+        self.assertTrue(csp.ac3(domains))
+        self.assertEqual(domains["Victoria"], ["green", "blue"])
+        self.assertEqual(domains["Tasmania"], ["red", "green", "blue"])
+        self.assertEqual(csp.stats.pruned, 5)
+
+    def test_ac3_detects_wipeout(self):
+        csp = CSP(["A", "B"], {"A": ["red"], "B": ["red"]})
+        csp.add_constraint(MapColoringConstraint("A", "B"))
+        self.assertFalse(csp.ac3({"A": ["red"], "B": ["red"]}))
+        self.assertIsNone(csp.backtracking_search(propagate=True))
+
+    def test_propagated_search(self):
+        csp = australia(["red", "green", "blue"])
+        solution = csp.backtracking_search(propagate=True)
+        self.assertTrue(is_solution(csp, solution))
+        self.assertGreater(csp.stats.pruned, 0)
+
+        csp = queens(8)
+        solution = csp.backtracking_search(propagate=True)
+        self.assertTrue(is_solution(csp, solution))
+        self.assertEqual(solution, queens(8).backtracking_search())
+
+
+class TestOrderingHeuristics(unittest.TestCase):
+    def test_minimum_remaining_values(self):
+        csp = australia(["red", "green", "blue"])
+        domains = dict(csp.domains)
+        unassigned = list(reversed(csp.variables))
+        # ties on domain size are broken by degree: South Australia has five neighbors
+        self.assertEqual(unassigned[minimum_remaining_values(csp, unassigned, domains)], "South Australia")
+        domains["Tasmania"] = ["red"]
+        self.assertEqual(unassigned[minimum_remaining_values(csp, unassigned, domains)], "Tasmania")
+
+    def test_least_constraining_value(self):
+        csp = australia(["red", "green", "blue"])
+        domains = dict(csp.domains)
+        domains["Victoria"] = ["red", "green"]
+        domains["New South Wales"] = ["red", "blue"]
+        self.assertEqual(least_constraining_value(csp, "South Australia", {}, domains),
+                         ["green", "blue", "red"])
+
+    def test_search_with_heuristics(self):
+        csp = queens(16)
+        csp.select_variable = minimum_remaining_values
+        csp.order_values = least_constraining_value
+        self.assertTrue(is_solution(csp, csp.backtracking_search(propagate=True)))
+
+        csp = australia(["red", "green", "blue"])
+        csp.select_variable = minimum_remaining_values
+        self.assertTrue(is_solution(csp, csp.backtracking_search()))
+
+
+class TestBacktrackingSearch(unittest.TestCase):
+    def test_partial_assignment_is_not_modified(self):
+        csp = australia(["red", "green", "blue"])
+        assignment = {"South Australia": "blue"}
+        solution = csp.backtracking_search(assignment)
+        self.assertTrue(is_solution(csp, solution))
+        self.assertEqual(solution["South Australia"], "blue")
+        self.assertEqual(assignment, {"South Australia": "blue"})
+        # the default assignment must not leak between calls
+        self.assertEqual(csp.backtracking_search(), csp.backtracking_search())
+
+    def test_unsatisfiable(self):
+        self.assertIsNone(queens(3).backtracking_search())
+        self.assertIsNone(queens(3).backtracking_search(propagate=True))
+
+    def test_deep_search(self):
+        csp = queens(20)
+        csp.select_variable = minimum_remaining_values
+        solution = csp.backtracking_search(propagate=True)
+        self.assertTrue(is_solution(csp, solution))
+
+
+class TestSolutions(unittest.TestCase):
+    def test_solutions(self):
+        csp = queens(6)
+        solutions = list(csp.solutions())
+        self.assertEqual(len(solutions), 4)
+        self.assertTrue(all(is_solution(csp, solution) for solution in solutions))
+        self.assertEqual(len({tuple(sorted(solution.items())) for solution in solutions}), 4)
+        self.assertEqual(solutions[0], csp.backtracking_search())
+        self.assertEqual(list(csp.solutions(limit=2)), solutions[:2])
+
+    def test_count_solutions(self):
+        self.assertEqual(queens(8).count_solutions(), 92)
+        self.assertEqual(queens(8).count_solutions(propagate=True), 92)
+        self.assertEqual(queens(8).count_solutions(limit=10), 10)
+        self.assertEqual(queens(3).count_solutions(), 0)
+        self.assertEqual(australia(["red", "green", "blue"]).count_solutions(), 12)
+
+    def test_complete_assignment(self):
+        csp = australia(["red", "green"])
+        self.assertEqual(csp.count_solutions({"Tasmania": "red"}), 0)
+        csp = CSP(["A", "B"], {"A": ["red", "green"], "B": ["red", "green"]})
+        csp.add_constraint(MapColoringConstraint("A", "B"))
+        self.assertEqual(list(csp.solutions({"A": "red", "B": "green"})), [{"A": "red", "B": "green"}])
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_csp_is_picklable(self):
+        csp = australia(["red", "green", "blue"])
+        csp.select_variable = minimum_remaining_values
+        csp.order_values = least_constraining_value
+        copy = pickle.loads(pickle.dumps(csp))
+        self.assertEqual(copy.backtracking_search(), csp.backtracking_search())
+
+    def test_parallel_search(self):
+        csp = queens(8)
+        solution = csp.parallel_search(workers=2)
+        self.assertTrue(is_solution(csp, solution))
+        self.assertGreater(sum(csp.worker_nodes.values()), 0)
+
+        csp = queens(8)
+        self.assertTrue(is_solution(csp, csp.parallel_search(propagate=True, workers=2, split_depth=2)))
+
+    def test_parallel_search_unsatisfiable(self):
+        self.assertIsNone(queens(3).parallel_search(workers=2))
+
+
+class TestBackjumping(unittest.TestCase):
+    def test_same_first_solution(self):
+        for n in (4, 8, 10):
+            self.assertEqual(queens(n).backtracking_search(backjump=True), queens(n).backtracking_search())
+        csp = australia(["red", "green", "blue"])
+        self.assertTrue(is_solution(csp, csp.backtracking_search({"Tasmania": "red"}, backjump=True)))
+        self.assertIsNone(australia(["red", "green"]).backtracking_search(backjump=True))
+        self.assertIsNone(queens(3).backtracking_search(backjump=True))
+
+    def test_jumps_over_unrelated_variables(self):
+        # A and B can never be told apart, whatever the variables in between do
+        variables = ["A", 1, 2, 3, 4, 5, "B"]
+        domains = {v: [1, 2, 3] for v in variables}
+        domains.update({"A": [1], "B": [1]})
+        chronological = CSP(variables, domains)
+        backjumping = CSP(variables, domains)
+        for csp in (chronological, backjumping):
+            csp.add_constraint(MapColoringConstraint("A", "B"))
+        self.assertIsNone(chronological.backtracking_search())
+        self.assertIsNone(backjumping.backtracking_search(backjump=True))
+        self.assertEqual(backjumping.stats.backjumps, 1)
+        self.assertEqual(backjumping.stats.nodes, 7)
+        self.assertEqual(chronological.stats.nodes, 1 + 3 + 9 + 27 + 81 + 243 * 2)
+
+    def test_nogood_cache(self):
+        # Z cannot follow X = 1, and X = 2 is ruled out while W = 1 or W = 2,
+        # so after W changes, Z fails again under X = 1 without trying a value
+        variables = ["W", "X", "Y", "Z"]
+        domains = {"W": [1, 2], "X": [1, 2], "Y": [1, 2], "Z": [1]}
+        csp = CSP(variables, domains)
+        csp.add_constraint(MapColoringConstraint("X", "Z"))
+        csp.add_constraint(Forbidden({"W": 1, "X": 2}))
+        csp.add_constraint(Forbidden({"W": 2, "X": 2}))
+        self.assertIsNone(csp.backtracking_search(backjump=True))
+        self.assertGreater(csp.stats.backjumps, 0)
+        self.assertEqual(csp.stats.nogood_hits, 1)
+        nodes = csp.stats.nodes
+
+        with patch("csp.NOGOOD_CACHE_SIZE", 0):
+            self.assertIsNone(csp.backtracking_search(backjump=True))
+        self.assertEqual(csp.stats.nogood_hits, 0)
+        self.assertGreater(csp.stats.nodes, nodes)
+
+    def test_propagate_is_rejected(self):
+        with self.assertRaises(ValueError):
+            queens(4).backtracking_search(propagate=True, backjump=True)
+
+
+class TestMinConflicts(unittest.TestCase):
+    def test_queens(self):
+        for n in (4, 8, 50):
+            csp = queens(n)
+            solution = csp.min_conflicts(seed=n)
+            self.assertTrue(is_solution(csp, solution))
+            self.assertGreaterEqual(csp.stats.nodes, 0)
+
+    def test_large_board_with_sampling(self):
+        n = 2000
+        columns = list(range(1, n + 1))
+        csp = CSP(columns, {column: columns for column in columns})
+        csp.add_constraint(QueensConstraint(columns))
+        solution = csp.min_conflicts(sample=64, seed=0)
+        self.assertEqual(len(set(solution.values())), n)
+        self.assertEqual(len({row - column for column, row in solution.items()}), n)
+        self.assertEqual(len({row + column for column, row in solution.items()}), n)
+
+    def test_default_conflict_counting(self):
+        csp = australia(["red", "green", "blue"])
+        self.assertTrue(is_solution(csp, csp.min_conflicts(seed=1)))
+        # local search cannot prove unsatisfiability, it just gives up
+        csp = australia(["red", "green"])
+        self.assertIsNone(csp.min_conflicts(max_steps=50, restarts=2, seed=1))
+        self.assertEqual(csp.stats.nodes, 150)
+
+    def test_neighbors_follow_new_constraints(self):
+        csp = CSP(["A", "B", "C"], {v: [1, 2] for v in "ABC"})
+        csp.add_constraint(MapColoringConstraint("A", "B"))
+        self.assertEqual(csp.neighbors["A"], {"B"})
+        csp.add_constraint(MapColoringConstraint("A", "C"))
+        self.assertEqual(csp.neighbors["A"], {"B", "C"})
+
+
+class TestSearchStats(unittest.TestCase):
+    def test_counts(self):
+        csp = queens(6)
+        csp.backtracking_search()
+        stats = csp.stats
+        self.assertEqual(stats.max_depth, 6)
+        self.assertGreater(stats.backtracks, 0)
+        self.assertGreater(stats.checks["QueensConstraint"], stats.nodes - 1)
+        self.assertEqual(stats.check_seconds, {})
+        self.assertGreater(stats.seconds, 0)
+        # every search starts from scratch
+        csp.backtracking_search()
+        self.assertIsNot(csp.stats, stats)
+        self.assertEqual(csp.stats.nodes, stats.nodes)
+        self.assertEqual(csp.stats.checks, stats.checks)
+
+    def test_propagation_counts_checks(self):
+        csp = australia(["red", "green", "blue"])
+        csp.backtracking_search(propagate=True)
+        self.assertGreater(csp.stats.checks["MapColoringConstraint"], csp.stats.nodes)
+
+    def test_profile(self):
+        csp = queens(6)
+        csp.profile = True
+        csp.backtracking_search()
+        self.assertEqual(set(csp.stats.check_seconds), {"QueensConstraint"})
+
+    def test_callbacks(self):
+        for backjump in (False, True):
+            csp = queens(6)
+            events = []
+            assigned = {}
+
+            def on_assign(variable, value):
+                self.assertNotIn(variable, assigned)
+                assigned[variable] = value
+                events.append(variable)
+
+            def on_unassign(variable, value):
+                self.assertEqual(assigned.pop(variable), value)
+
+            csp.on_assign = on_assign
+            csp.on_unassign = on_unassign
+            solution = csp.backtracking_search(backjump=backjump)
+            self.assertEqual(assigned, solution)
+            self.assertEqual(len(events), csp.stats.nodes)
+
+
+def pigeonhole(pigeons):
+    # more pigeons than holes: unsatisfiable, but only after a huge search
+    csp = CSP(list(range(pigeons)), {p: list(range(pigeons - 1)) for p in range(pigeons)})
+    for p in range(pigeons):
+        for q in range(p + 1, pigeons):
+            csp.add_constraint(MapColoringConstraint(p, q))
+    return csp
+
+
+class TestBudgets(unittest.TestCase):
+    def test_solved(self):
+        for backjump in (False, True):
+            result = queens(8).solve(backjump=backjump, node_limit=10_000)
+            self.assertEqual(result.status, SearchStatus.SOLVED)
+            self.assertIs(result.partial, result.solution)
+
+    def test_unsatisfiable(self):
+        csp = australia(["red", "green"])
+        for backjump in (False, True):
+            result = csp.solve(backjump=backjump)
+            self.assertEqual(result.status, SearchStatus.UNSATISFIABLE)
+            self.assertIsNone(result.solution)
+            self.assertFalse(csp.stats.stopped)
+        result = csp.solve(propagate=True)
+        self.assertEqual(result.status, SearchStatus.UNSATISFIABLE)
+        self.assertEqual(result.partial, {})
+
+    def test_node_limit(self):
+        for backjump in (False, True):
+            csp = pigeonhole(10)
+            result = csp.solve(backjump=backjump, node_limit=500)
+            self.assertEqual(result.status, SearchStatus.BUDGET_EXHAUSTED)
+            self.assertEqual(csp.stats.nodes, 500)
+            self.assertTrue(csp.stats.stopped)
+            # every pigeon but one fits
+            self.assertEqual(len(result.partial), 9)
+            self.assertEqual(len(set(result.partial.values())), 9)
+
+    def test_timeout(self):
+        csp = pigeonhole(12)
+        result = csp.solve(propagate=True, timeout=0.05)
+        self.assertEqual(result.status, SearchStatus.BUDGET_EXHAUSTED)
+        self.assertLess(csp.stats.seconds, 5)
+        self.assertGreater(len(result.partial), 0)
+
+    def test_partial_keeps_given_assignment(self):
+        result = pigeonhole(10).solve({0: 3}, node_limit=1)
+        self.assertEqual(result.status, SearchStatus.BUDGET_EXHAUSTED)
+        self.assertEqual(result.partial[0], 3)
+
+
+class Sum(Constraint):
+    # x + y == z, written out as a function
+    def satisfied(self, assignment):
+        if not all(v in assignment for v in self.variables):
+            return True
+        x, y, z = (assignment[v] for v in self.variables)
+        return x + y == z
+
+
+def sums(constraint_type):
+    csp = CSP(["x", "y", "z"], {"x": list(range(4)), "y": list(range(4)), "z": list(range(10))})
+    if constraint_type is TableConstraint:
+        csp.add_constraint(TableConstraint(["x", "y", "z"],
+                                           [(x, y, x + y) for x in range(10) for y in range(10) if x + y < 10]))
+    else:
+        csp.add_constraint(Sum(["x", "y", "z"]))
+    return csp
+
+
+class TestTableConstraint(unittest.TestCase):
+    def test_same_solutions(self):
+        for propagate in (False, True):
+            table = list(sums(TableConstraint).solutions(propagate=propagate))
+            function = list(sums(Sum).solutions(propagate=propagate))
+            self.assertEqual(table, function)
+            self.assertEqual(len(table), 16)
+
+    def test_generalized_arc_consistency(self):
+        csp = sums(TableConstraint)
+        domains = {v: list(values) for v, values in csp.domains.items()}
+        self.assertTrue(csp.ac3(domains))
+        self.assertEqual(domains["z"], list(range(7)))
+        # pairs of values alone cannot rule anything out
+        csp = sums(Sum)
+        domains = {v: list(values) for v, values in csp.domains.items()}
+        self.assertTrue(csp.ac3(domains))
+        self.assertEqual(domains["z"], list(range(10)))
+
+    def test_wipeout(self):
+        csp = CSP(["a", "b"], {"a": [1, 2], "b": [1, 2]})
+        csp.add_constraint(TableConstraint(["a", "b"], [(1, 3), (3, 2)]))
+        self.assertIsNone(csp.backtracking_search(propagate=True))
+        self.assertEqual(csp.stats.nodes, 0)
+
+    def test_culprits(self):
+        constraint = TableConstraint(["a", "b", "c"], [(1, 1, 1), (2, 2, 2)])
+        assignment = {"a": 1, "b": 1, "c": 2}
+        self.assertFalse(constraint.satisfied_incremental(assignment, "c", 2))
+        self.assertEqual(constraint.culprits(assignment, "c", 2), {"a"})
+        csp = CSP(["a", "b", "c"], {v: [1, 2] for v in "abc"})
+        csp.add_constraint(constraint)
+        self.assertIn(csp.backtracking_search(backjump=True), ({"a": 1, "b": 1, "c": 1}, {"a": 2, "b": 2, "c": 2}))
+
+    def test_tuple_length(self):
+        with self.assertRaises(ValueError):
+            TableConstraint(["a", "b"], [(1, 2, 3)])
+
+
+class TestAllDifferent(unittest.TestCase):
+    def test_filtering_matches_brute_force(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            variables = list(range(rng.randint(1, 5)))
+            domains = {v: sorted(rng.sample(range(6), rng.randint(1, 6))) for v in variables}
+            constraint = AllDifferent(variables)
+            solutions = [values for values in itertools.product(*domains.values()) if len(set(values)) == len(values)]
+            for v in variables:
+                self.assertEqual(constraint.supports(domains, v), sorted({values[v] for values in solutions}))
+
+    def test_hall_interval(self):
+        # a and b share {1, 2}, so c cannot use them; pairwise checks miss this
+        csp = CSP(["a", "b", "c"], {"a": [1, 2], "b": [1, 2], "c": [1, 2, 3]})
+        csp.add_constraint(AllDifferent(["a", "b", "c"]))
+        domains = {v: list(values) for v, values in csp.domains.items()}
+        self.assertTrue(csp.ac3(domains))
+        self.assertEqual(domains["c"], [3])
+
+    def test_pigeonhole(self):
+        variables = list(range(12))
+        csp = CSP(variables, {v: list(range(11)) for v in variables})
+        csp.add_constraint(AllDifferent(variables))
+        self.assertEqual(csp.solve(propagate=True).status, SearchStatus.UNSATISFIABLE)
+        self.assertEqual(csp.stats.nodes, 0)
+        # the same pairwise: still going after thousands of nodes
+        self.assertEqual(pigeonhole(12).solve(propagate=True, node_limit=5000).status,
+                         SearchStatus.BUDGET_EXHAUSTED)
+
+    def test_search(self):
+        constraint = AllDifferent(["a", "b", "c"])
+        self.assertTrue(constraint.satisfied({"a": 1, "c": 2}))
+        self.assertFalse(constraint.satisfied_incremental({"a": 1, "b": 2, "c": 1}, "c", 1))
+        self.assertEqual(constraint.culprits({"a": 1, "b": 2, "c": 1}, "c", 1), {"a"})
+        self.assertEqual(constraint.conflicts({"a": 1, "b": 1}, "c", 1), 2)
+        csp = CSP(["a", "b", "c"], {v: [1, 2, 3] for v in "abc"})
+        csp.add_constraint(constraint)
+        self.assertEqual(csp.count_solutions(propagate=True), 6)
+        self.assertEqual(csp.count_solutions(), 6)
+        self.assertTrue(is_solution(csp, csp.min_conflicts(seed=0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
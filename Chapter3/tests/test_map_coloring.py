@@ -16,7 +16,34 @@
 
 import unittest
 
-from map_coloring import MapColoringConstraint
+from map_coloring import MapColoringConstraint, adjacency_from_graph, coloring_csp, dsatur_coloring
+from map_coloring import is_proper_coloring, region_map
+
+AUSTRALIA = {"Western Australia": ["Northern Territory", "South Australia"],
+             "Northern Territory": ["South Australia", "Queensland"],
+             "South Australia": ["Queensland", "New South Wales", "Victoria"],
+             "Queensland": ["New South Wales"],
+             "New South Wales": ["Victoria"],
+             "Victoria": ["Tasmania"],
+             "Tasmania": []}
+
+
+class ListGraph:
+    # the part of the Chapter 4 Graph interface that adjacency_from_graph reads
+    def __init__(self, vertices, edges):
+        self.vertices = vertices
+        self.edges = edges
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    def vertex_at(self, index):
+        return self.vertices[index]
+
+    def neighbors_for_index(self, index):
+        return [self.vertices[v] for u, v in self.edges if u == index] + \
+               [self.vertices[u] for u, v in self.edges if v == index]
 
 
 class TestMapColoring(unittest.TestCase):
@@ -31,6 +58,53 @@ class TestMapColoring(unittest.TestCase):
         assignment = {"Western Australia": "green"}
         self.assertTrue(constraint.satisfied(assignment))
 
+    def test_satisfied_incremental(self):
+        constraint = MapColoringConstraint("Western Australia", "Northern Territory")
+        assignment = {"Western Australia": "red", "Northern Territory": "red"}
+        self.assertFalse(constraint.satisfied_incremental(assignment, "Northern Territory", "red"))
+
+        assignment = {"Western Australia": "green"}
+        self.assertTrue(constraint.satisfied_incremental(assignment, "Western Australia", "green"))
+
+    def test_dsatur_australia(self):
+        coloring = dsatur_coloring(AUSTRALIA, 3)
+        self.assertEqual(set(coloring), set(AUSTRALIA))
+        self.assertTrue(is_proper_coloring(AUSTRALIA, coloring, 3))
+        self.assertIsNone(dsatur_coloring(AUSTRALIA, 2))
+
+    def test_dsatur_infeasible(self):
+        k4 = {0: [1, 2, 3], 1: [2, 3], 2: [3], 3: []}
+        self.assertIsNone(dsatur_coloring(k4, 3))
+        self.assertIsNotNone(dsatur_coloring(k4, 4))
+        # a hub bordering a ring of five regions needs four colors
+        wheel = {"hub": [0, 1, 2, 3, 4], 0: [1], 1: [2], 2: [3], 3: [4], 4: [0]}
+        self.assertIsNone(dsatur_coloring(wheel, 3))
+        self.assertTrue(is_proper_coloring(wheel, dsatur_coloring(wheel, 4), 4))
+        self.assertIsNone(dsatur_coloring({"a": ["a"]}, 3))
+
+    def test_dsatur_agrees_with_csp(self):
+        for seed in range(5):
+            adjacency = region_map(4, 4, seed)
+            for colors in (2, 3, 4):
+                coloring = dsatur_coloring(adjacency, colors)
+                solution = coloring_csp(adjacency, colors).backtracking_search(propagate=True)
+                self.assertEqual(coloring is None, solution is None)
+                if coloring is not None:
+                    self.assertTrue(is_proper_coloring(adjacency, coloring, colors))
+
+    def test_dsatur_large_map(self):
+        adjacency = region_map(100, 100)
+        coloring = dsatur_coloring(adjacency, 4)
+        self.assertEqual(len(coloring), 10000)
+        self.assertTrue(is_proper_coloring(adjacency, coloring, 4))
+
+    def test_adjacency_from_graph(self):
+        graph = ListGraph(["a", "b", "c"], [(0, 1), (1, 2), (2, 0)])
+        adjacency = adjacency_from_graph(graph)
+        self.assertCountEqual(adjacency["a"], ["b", "c"])
+        self.assertIsNone(dsatur_coloring(adjacency, 2))
+        self.assertIsNotNone(dsatur_coloring(adjacency, 3))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,9 +14,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import random
 import unittest
 
-from queens import QueensConstraint
+from csp import CSP
+from queens import QueensConstraint, queens_solution, count_queens_solutions
 
 
 class TestQueensConstraint(unittest.TestCase):
@@ -31,6 +33,60 @@ class TestQueensConstraint(unittest.TestCase):
         assignment = {1: 1, 2: 5, 3: 8, 4: 6, 5: 3, 6: 7, 7: 2}
         self.assertTrue(constraint.satisfied(assignment))
 
+    def test_satisfied_incremental(self):
+        constraint = QueensConstraint([1, 2, 3, 4, 5, 6, 7, 8])
+        assignment = {1: 1, 2: 5, 3: 8, 4: 6, 5: 3, 6: 7, 7: 2, 8: 4}
+        self.assertTrue(constraint.satisfied_incremental(assignment, 8, 4))
+
+        assignment = {1: 1, 2: 5, 3: 8, 4: 6, 5: 3, 6: 7, 7: 2, 8: 5}
+        self.assertFalse(constraint.satisfied_incremental(assignment, 8, 5))
+
+        assignment = {1: 1, 2: 5, 3: 3}
+        self.assertFalse(constraint.satisfied_incremental(assignment, 3, 3))
+
+    def test_culprits(self):
+        constraint = QueensConstraint([1, 2, 3, 4])
+        # the queen in column 3 is attacked by both others; the first placed is blamed
+        self.assertEqual(constraint.culprits({1: 1, 2: 4, 3: 1}, 3, 1), {1})
+        self.assertEqual(constraint.culprits({1: 2, 2: 4, 3: 3}, 3, 3), {2})
+
+    def test_conflict_counting(self):
+        n = 8
+        columns = list(range(1, n + 1))
+        constraint = QueensConstraint(columns)
+        constraint.reset_conflicts()
+        rng = random.Random(0)
+        assignment = {}
+        for column in columns:
+            assignment[column] = rng.randint(1, n)
+            constraint.moved(assignment, column, None)
+        for _ in range(200):
+            column = rng.choice(columns)
+            old = assignment[column]
+            assignment[column] = rng.randint(1, n)
+            constraint.moved(assignment, column, old)
+            for qc in columns:
+                attackers = {c for c, r in assignment.items() if c != qc and
+                             (r == assignment[qc] or abs(r - assignment[qc]) == abs(c - qc))}
+                self.assertEqual(constraint.conflicts(assignment, qc, assignment[qc]), len(attackers))
+                self.assertEqual(set(constraint.conflicting(assignment, qc)), attackers)
+            self.assertCountEqual(constraint.free_rows, set(range(1, n + 1)) - set(assignment.values()))
+
+
+class TestBitboardQueens(unittest.TestCase):
+    def test_count_queens_solutions(self):
+        counts = [count_queens_solutions(n) for n in range(1, 13)]
+        self.assertEqual(counts, [1, 0, 0, 2, 10, 4, 40, 92, 352, 724, 2680, 14200])
+
+    def test_queens_solution_matches_csp(self):
+        for n in [1, 4, 5, 8]:
+            columns = list(range(1, n + 1))
+            csp = CSP(columns, {column: list(range(1, n + 1)) for column in columns})
+            csp.add_constraint(QueensConstraint(columns))
+            self.assertEqual(queens_solution(n), csp.backtracking_search())
+            self.assertEqual(count_queens_solutions(n), csp.count_solutions())
+        self.assertIsNone(queens_solution(3))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+# tests_send_more_money.py
+# unit test of send_more_money.py
+# Copyright 2023 Kyungwon Chun
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from send_more_money import SendMoreMoneyConstraint, ColumnConstraint
+from send_more_money import parse_cryptarithm, cryptarithm_csp, solve_cryptarithm
+
+
+def value(word, solution):
+    return int("".join(str(solution[letter]) for letter in word))
+
+
+class TestSendMoreMoney(unittest.TestCase):
+    def test_satisfied(self):
+        letters = ["S", "E", "N", "D", "M", "O", "R", "Y"]
+        constraint = SendMoreMoneyConstraint(letters)
+        self.assertTrue(constraint.satisfied({"S": 9, "E": 5, "N": 6, "D": 7, "M": 1, "O": 0, "R": 8, "Y": 2}))
+        self.assertFalse(constraint.satisfied({"S": 9, "E": 5, "N": 6, "D": 7, "M": 1, "O": 0, "R": 8, "Y": 3}))
+        self.assertFalse(constraint.satisfied({"S": 9, "E": 9}))
+
+
+class TestCryptarithm(unittest.TestCase):
+    def test_parse_cryptarithm(self):
+        self.assertEqual(parse_cryptarithm("send + more = money"), (["SEND", "MORE"], "MONEY"))
+        for expression in ["SEND + MORE", "SEND + MORE = MONEY = CASH", "SEND + M0RE = MONEY",
+                           "ABCDE + FGHIJ = KAB"]:
+            with self.assertRaises(ValueError):
+                parse_cryptarithm(expression)
+
+    def test_column_constraint(self):
+        # ones column of SEND + MORE = MONEY: D + E = Y (mod 10)
+        constraint = ColumnConstraint(["SEND", "MORE"], "MONEY", 0)
+        self.assertCountEqual(constraint.variables, ["D", "E", "Y"])
+        self.assertTrue(constraint.satisfied({"D": 7, "E": 5, "Y": 2}))
+        self.assertFalse(constraint.satisfied({"D": 7, "E": 5, "Y": 3}))
+        # with only Y left, its digit would have to be 2, which is taken
+        self.assertFalse(constraint.satisfied({"D": 7, "E": 5, "S": 2}))
+        self.assertTrue(constraint.satisfied({"D": 7}))
+
+    def test_solve_cryptarithm(self):
+        for expression in ["SEND + MORE = MONEY", "CROSS + ROADS = DANGER", "TO + GO = OUT",
+                           "THIS + IS + TOO = HARD"]:
+            addends, result = parse_cryptarithm(expression)
+            solution = solve_cryptarithm(expression)
+            if solution is None:
+                continue
+            self.assertEqual(sum(value(word, solution) for word in addends), value(result, solution))
+            self.assertEqual(len(set(solution.values())), len(solution))
+            self.assertTrue(all(solution[word[0]] != 0 for word in addends + [result]))
+        self.assertEqual(solve_cryptarithm("SEND + MORE = MONEY"),
+                         {"S": 9, "E": 5, "N": 6, "D": 7, "M": 1, "O": 0, "R": 8, "Y": 2})
+        self.assertIsNone(solve_cryptarithm("AB + AB = ABC"))
+        self.assertEqual(cryptarithm_csp("AB + AB = ABC").count_solutions(), 0)
+
+    def test_distinct_digits_propagate(self):
+        csp = cryptarithm_csp("AB + AB = ABC")
+        self.assertIsNone(csp.backtracking_search(propagate=True))
+        self.assertIsNotNone(cryptarithm_csp("TO + GO = OUT").backtracking_search(propagate=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
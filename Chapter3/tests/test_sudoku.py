@@ -0,0 +1,157 @@
+# tests_sudoku.py
+# unit test of sudoku.py
+# Copyright 2023 Kyungwon Chun
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sudoku import BitmaskSudoku, SodukoRowConstraint, SodukoSubgridConstraint
+from sudoku import parse_puzzle, format_puzzle, generate_domain, solve_file, generate_puzzle, box_size
+from sudoku import sudoku_csp, fill_grid, generate_grid
+
+PUZZLE = "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+HARD_PUZZLE = "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......"
+
+
+def to_grid(puzzle):
+    return [[int(ch) if ch.isdigit() else 0 for ch in puzzle[r * 9:(r + 1) * 9]] for r in range(9)]
+
+
+def is_valid_solution(grid, puzzle):
+    box = box_size(grid)
+    size = box * box
+    digits = list(range(1, size + 1))
+    rows = [row for row in grid]
+    columns = [[grid[r][c] for r in range(size)] for c in range(size)]
+    boxes = [[grid[r][c] for r in range(br, br + box) for c in range(bc, bc + box)]
+             for br in range(0, size, box) for bc in range(0, size, box)]
+    givens = puzzle if isinstance(puzzle, list) else parse_puzzle(puzzle)
+    givens_kept = all(grid[r][c] == givens[r][c] for r in range(size) for c in range(size) if givens[r][c])
+    return givens_kept and all(sorted(unit) == digits for unit in rows + columns + boxes)
+
+
+class TestSudokuConstraints(unittest.TestCase):
+    def test_row_constraint(self):
+        constraint = SodukoRowConstraint(0)
+        self.assertTrue(constraint.satisfied({(0, 0): 1, (0, 1): 2, (1, 1): 1}))
+        self.assertFalse(constraint.satisfied({(0, 0): 1, (0, 8): 1}))
+        self.assertFalse(constraint.satisfied_incremental({(0, 0): 1, (0, 8): 1}, (0, 8), 1))
+
+    def test_subgrid_constraint(self):
+        constraint = SodukoSubgridConstraint((3, 3))
+        self.assertTrue(constraint.satisfied({(3, 3): 5, (4, 4): 6, (3, 6): 5}))
+        self.assertFalse(constraint.satisfied({(3, 3): 5, (5, 5): 5}))
+
+
+class TestSudokuCSP(unittest.TestCase):
+    def test_solve_with_propagation(self):
+        for puzzle in [PUZZLE, HARD_PUZZLE]:
+            csp = sudoku_csp(parse_puzzle(puzzle))
+            solution = csp.backtracking_search(propagate=True)
+            self.assertTrue(is_valid_solution(fill_grid(generate_grid(), solution), puzzle))
+            # the unit filtering leaves nothing to guess on these puzzles
+            self.assertEqual(csp.stats.backtracks, 0)
+
+    def test_unsolvable(self):
+        # the last cell of the first row can hold neither 9 (column) nor 1-8 (row)
+        csp = sudoku_csp(to_grid("12345678." + "." * 71 + "9"))
+        self.assertIsNone(csp.backtracking_search(propagate=True))
+        self.assertEqual(csp.stats.nodes, 0)
+
+
+class TestBitmaskSudoku(unittest.TestCase):
+    def test_candidates(self):
+        solver = BitmaskSudoku(to_grid(PUZZLE))
+        # row 0 holds 2, 3, 6; column 0 holds 7, 8, 9; the box holds 1, 9
+        self.assertEqual(solver.candidates(0), (1 << 3) | (1 << 4))
+        self.assertFalse(solver.place(0, 3))
+        self.assertTrue(solver.place(0, 4))
+
+    def test_solve(self):
+        for puzzle in [PUZZLE, HARD_PUZZLE, "." * 81]:
+            solution = BitmaskSudoku(to_grid(puzzle)).solve()
+            self.assertTrue(is_valid_solution(solution, puzzle))
+        solver = BitmaskSudoku(to_grid(PUZZLE))
+        solver.solve()
+        self.assertEqual(solver.guesses, 0)
+
+    def test_larger_grids(self):
+        rng = random.Random(1)
+        for box, holes in [(2, 0.75), (4, 0.6), (5, 0.3)]:
+            puzzle = generate_puzzle(box, holes, rng)
+            self.assertEqual(sum(value == 0 for row in puzzle for value in row), int(holes * box ** 4))
+            self.assertTrue(is_valid_solution(BitmaskSudoku(puzzle).solve(), puzzle))
+
+    def test_restarts(self):
+        puzzle = generate_puzzle(4, 0.65, random.Random(0))
+        solver = BitmaskSudoku(puzzle)
+        with patch("sudoku.RESTART_GUESSES", 1):
+            self.assertTrue(is_valid_solution(solver.solve(), puzzle))
+        self.assertGreater(solver.guesses, 1)
+
+    def test_unsolvable(self):
+        self.assertIsNone(BitmaskSudoku(to_grid("11" + "." * 79)).solve())
+        # the last cell of the first row can hold neither 9 (column) nor 1-8 (row)
+        self.assertIsNone(BitmaskSudoku(to_grid("12345678." + "." * 71 + "9")).solve())
+
+
+class TestPuzzleInput(unittest.TestCase):
+    def test_parse_puzzle(self):
+        grid = parse_puzzle(HARD_PUZZLE + "\n")
+        self.assertEqual(grid, to_grid(HARD_PUZZLE))
+        self.assertEqual(format_puzzle(parse_puzzle(PUZZLE)), PUZZLE)
+        with self.assertRaises(ValueError):
+            parse_puzzle(PUZZLE[:80])
+        with self.assertRaises(ValueError):
+            parse_puzzle("x" + PUZZLE[1:])
+
+        line = "G" + "." * 254 + "a"
+        grid = parse_puzzle(line)
+        self.assertEqual((len(grid), grid[0][0], grid[15][15]), (16, 16, 10))
+        self.assertEqual(format_puzzle(grid), "G" + "0" * 254 + "A")
+        with self.assertRaises(ValueError):
+            parse_puzzle("H" + "." * 255)
+
+    def test_generate_domain_with_givens(self):
+        domain = generate_domain(parse_puzzle(PUZZLE))
+        self.assertEqual(domain[(0, 2)], [3])
+        self.assertEqual(domain[(0, 0)], [4, 5])
+        self.assertEqual(len(generate_domain()[(0, 0)]), 9)
+        self.assertEqual(len(generate_domain(box=4)), 256)
+        self.assertEqual(generate_domain(box=4)[(15, 15)], list(range(1, 17)))
+
+    def test_solve_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "puzzles.txt")
+            target = os.path.join(directory, "solutions.txt")
+            with open(source, "w") as f:
+                f.write(PUZZLE + "\n\n" + HARD_PUZZLE + "\n" + "11" + "." * 79 + "\n")
+            for workers in [None, 2]:
+                stats = solve_file(source, target, workers, chunk_size=1)
+                self.assertEqual((stats.puzzles, stats.solved), (3, 2))
+                self.assertLessEqual(stats.p50, stats.p99)
+                self.assertGreater(stats.puzzles_per_second, 0)
+                with open(target) as f:
+                    lines = f.read().splitlines()
+                self.assertTrue(is_valid_solution(parse_puzzle(lines[0]), PUZZLE))
+                self.assertTrue(is_valid_solution(parse_puzzle(lines[1]), HARD_PUZZLE))
+                self.assertEqual(lines[2], "No solution found!")
+
+
+if __name__ == '__main__':
+    unittest.main()
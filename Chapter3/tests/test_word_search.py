@@ -16,7 +16,8 @@
 
 import unittest
 
-from word_search import generate_grid, generate_domain, GridLocation
+from word_search import generate_grid, generate_domain, GridLocation, WordSearchConstraint
+from word_search import BLANK, Placement, PlacementConstraint, generate_blank_grid, generate_placements, letter_index
 
 
 class TestWordSearch(unittest.TestCase):
@@ -38,6 +39,58 @@ class TestWordSearch(unittest.TestCase):
         domain = generate_domain(word, grid)
         self.assertEqual(len(domain), 2 * 14)
 
+    def test_word_search_constraint_incremental(self):
+        constraint = WordSearchConstraint(['JOE', 'OAK'])
+        joe = [GridLocation(0, 0), GridLocation(0, 1), GridLocation(0, 2)]
+        oak = [GridLocation(0, 1), GridLocation(1, 1), GridLocation(2, 1)]
+        self.assertTrue(constraint.satisfied_incremental({'JOE': joe, 'OAK': oak}, 'OAK', oak))
+
+        oak = [GridLocation(0, 2), GridLocation(1, 2), GridLocation(2, 2)]
+        self.assertFalse(constraint.satisfied_incremental({'JOE': joe, 'OAK': oak}, 'OAK', oak))
+
+    def test_letter_index(self):
+        grid = [['A', 'B'], ['B', BLANK]]
+        index = letter_index(grid)
+        self.assertEqual(index['A'], [GridLocation(0, 0)])
+        self.assertEqual(index['B'], [GridLocation(0, 1), GridLocation(1, 0)])
+        self.assertEqual(index[BLANK], [GridLocation(1, 1)])
+
+    def test_generate_placements_blank_grid(self):
+        grid = [['P', 'Y', 'T', 'H', 'O', 'N'],
+                ['A', 'B', 'C', 'D', 'E', 'F'],
+                ['G', 'H', 'I', 'J', 'K', 'L'],
+                ['M', 'N', 'O', 'P', 'Q', 'R'],
+                ['S', 'T', 'U', 'V', 'W', 'X'],
+                ['Y', 'Z', 'A', 'B', 'C', 'D']]
+        placements = generate_placements('PYTHON', generate_blank_grid(6, 6))
+        self.assertEqual(sorted(p.locations() for p in placements),
+                         sorted(generate_domain('PYTHON', grid)))
+
+    def test_generate_placements_fixed_letters(self):
+        grid = [['P', 'Y', 'T', 'H', 'O', 'N'],
+                ['A', 'B', 'C', 'D', 'E', 'F'],
+                ['G', 'H', 'I', 'J', 'K', 'L'],
+                ['M', 'N', 'O', 'P', 'Q', 'R'],
+                ['S', 'T', 'U', 'V', 'W', 'X'],
+                ['Y', 'Z', 'A', 'B', 'C', 'D']]
+        self.assertEqual(generate_placements('PYTHON', grid), [Placement(0, 0, 0, 6)])
+        grid[0][2] = BLANK
+        grid[5] = [BLANK] * 6
+        placements = generate_placements('PYTHON', grid)
+        self.assertIn(Placement(0, 0, 0, 6), placements)
+        self.assertIn(Placement(5, 5, 1, 6), placements)
+        self.assertEqual(len(placements), 3)
+
+    def test_placement_constraint(self):
+        constraint = PlacementConstraint(['JOE', 'OAK'])
+        joe = Placement(0, 0, 0, 3)
+        oak = Placement(0, 1, 2, 3)
+        self.assertTrue(constraint.satisfied({'JOE': joe, 'OAK': oak}))
+        self.assertTrue(constraint.satisfied_incremental({'JOE': joe, 'OAK': oak}, 'OAK', oak))
+        oak = Placement(0, 2, 2, 3)
+        self.assertFalse(constraint.satisfied({'JOE': joe, 'OAK': oak}))
+        self.assertFalse(constraint.satisfied_incremental({'JOE': joe, 'OAK': oak}, 'OAK', oak))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,12 +14,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import NamedTuple, List, Dict, Optional
+from typing import NamedTuple, List, Dict, Optional, Tuple, Iterator, Set
 from random import choice
 from string import ascii_uppercase
 from csp import CSP, Constraint
 
 Grid = List[List[str]]  # type alias for grids
+BLANK: str = "."  # a cell that no letter has been fixed in yet
 
 
 class GridLocation(NamedTuple):
@@ -32,6 +33,19 @@ def generate_grid(rows: int, columns: int) -> Grid:
     return [[choice(ascii_uppercase) for c in range(columns)] for r in range(rows)]
 
 
+def generate_blank_grid(rows: int, columns: int) -> Grid:
+    # initialize grid without any fixed letter
+    return [[BLANK for c in range(columns)] for r in range(rows)]
+
+
+def fill_blanks(grid: Grid) -> None:
+    # replace the cells still blank with random letters
+    for row in grid:
+        for c, letter in enumerate(row):
+            if letter == BLANK:
+                row[c] = choice(ascii_uppercase)
+
+
 def display_grid(grid: Grid) -> None:
     for row in grid:
         print("".join(row))
@@ -66,6 +80,99 @@ def generate_domain(word: str, grid: Grid) -> List[List[GridLocation]]:
     return domain
 
 
+# The eight directions a word can run in, as (row step, column step)
+DIRECTIONS: List[Tuple[int, int]] = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1), (1, -1), (-1, 1)]
+
+
+# A compact placement of a word: where it starts, which of the DIRECTIONS it
+# runs in and how long it is, instead of a list of every location it covers
+class Placement(NamedTuple):
+    row: int
+    column: int
+    direction: int
+    length: int
+
+    def locations(self) -> List[GridLocation]:
+        dr, dc = DIRECTIONS[self.direction]
+        return [GridLocation(self.row + i * dr, self.column + i * dc) for i in range(self.length)]
+
+
+# Map each letter fixed in the grid, and BLANK, to the cells holding it
+def letter_index(grid: Grid) -> Dict[str, List[GridLocation]]:
+    index: Dict[str, List[GridLocation]] = {}
+    for r, row in enumerate(grid):
+        for c, letter in enumerate(row):
+            index.setdefault(letter, []).append(GridLocation(r, c))
+    return index
+
+
+# Every placement of word whose cells are either blank or already hold the
+# right letter. Only cells holding the first letter (or blank) can start the
+# word, so the index avoids trying the rest of the grid at all.
+def generate_placements(word: str, grid: Grid, index: Optional[Dict[str, List[GridLocation]]] = None) -> List[Placement]:
+    if index is None:
+        index = letter_index(grid)
+    height: int = len(grid)
+    width: int = len(grid[0])
+    length: int = len(word)
+    starts: List[GridLocation] = index.get(word[0], []) + (index.get(BLANK, []) if word[0] != BLANK else [])
+    placements: List[Placement] = []
+    for row, col in starts:
+        for direction, (dr, dc) in enumerate(DIRECTIONS):
+            end_row: int = row + (length - 1) * dr
+            end_col: int = col + (length - 1) * dc
+            if not (0 <= end_row < height and 0 <= end_col < width):
+                continue
+            for i in range(1, length):
+                letter: str = grid[row + i * dr][col + i * dc]
+                if letter != BLANK and letter != word[i]:
+                    break
+            else:
+                placements.append(Placement(row, col, direction, length))
+    return placements
+
+
+# Words placed as Placements may only cross where they share the same letter
+class PlacementConstraint(Constraint[str, Placement]):
+    def __init__(self, words: List[str]) -> None:
+        super().__init__(words)
+        self.words: List[str] = words
+
+    def satisfied(self, assignment: Dict[str, Placement]) -> bool:
+        assigned_locations: Dict[Tuple[int, int], str] = {}
+        for word, placement in assignment.items():
+            for location, letter in _cells(word, placement):
+                if assigned_locations.setdefault(location, letter) != letter:
+                    return False
+        return True
+
+    def satisfied_incremental(self, assignment: Dict[str, Placement], last_variable: str,
+                              last_value: Placement) -> bool:
+        # only the newly placed word can disagree with the words already placed
+        placed: Dict[Tuple[int, int], str] = dict(_cells(last_variable, last_value))
+        for word, placement in assignment.items():
+            if word != last_variable:
+                for location, letter in _cells(word, placement):
+                    if placed.get(location, letter) != letter:
+                        return False
+        return True
+
+    def culprits(self, assignment: Dict[str, Placement], last_variable: str, last_value: Placement) -> Set[str]:
+        placed: Dict[Tuple[int, int], str] = dict(_cells(last_variable, last_value))
+        for word, placement in assignment.items():
+            if word != last_variable:
+                for location, letter in _cells(word, placement):
+                    if placed.get(location, letter) != letter:
+                        return {word}
+        return set()
+
+
+def _cells(word: str, placement: Placement) -> Iterator[Tuple[Tuple[int, int], str]]:
+    dr, dc = DIRECTIONS[placement.direction]
+    for i, letter in enumerate(word):
+        yield (placement.row + i * dr, placement.column + i * dc), letter
+
+
 class WordSearchConstraint(Constraint[str, List[GridLocation]]):
     def __init__(self, words: List[str]) -> None:
         super().__init__(words)
@@ -81,22 +188,44 @@ class WordSearchConstraint(Constraint[str, List[GridLocation]]):
                 elif assigned_locations[grid_location] != letter:
                     return False
         return True
+
+    def satisfied_incremental(self, assignment: Dict[str, List[GridLocation]], last_variable: str,
+                              last_value: List[GridLocation]) -> bool:
+        # only the newly placed word can disagree with the words already placed
+        placed: Dict[GridLocation, str] = dict(zip(last_value, last_variable))
+        for word, location in assignment.items():
+            if word != last_variable:
+                for letter, grid_location in zip(word, location):
+                    if placed.get(grid_location, letter) != letter:
+                        return False
+        return True
+
+    def culprits(self, assignment: Dict[str, List[GridLocation]], last_variable: str,
+                 last_value: List[GridLocation]) -> Set[str]:
+        placed: Dict[GridLocation, str] = dict(zip(last_value, last_variable))
+        for word, location in assignment.items():
+            if word != last_variable:
+                for letter, grid_location in zip(word, location):
+                    if placed.get(grid_location, letter) != letter:
+                        return {word}
+        return set()
     
 
 if __name__ == "__main__":
-    grid: Grid = generate_grid(9, 9)
+    grid: Grid = generate_blank_grid(9, 9)
     words: List[str] = ["MATTHEW", "JOE", "MARY", "SARAH", "SALLY"]
-    locations: Dict[str, List[List[GridLocation]]] = {}
+    index: Dict[str, List[GridLocation]] = letter_index(grid)
+    placements: Dict[str, List[Placement]] = {}
     for word in words:
-        locations[word] = generate_domain(word, grid)
-    csp: CSP[str, List[GridLocation]] = CSP(words, locations)
-    csp.add_constraint(WordSearchConstraint(words))
-    solution: Optional[Dict[str, List[GridLocation]]] = csp.backtracking_search()
+        placements[word] = generate_placements(word, grid, index)
+    csp: CSP[str, Placement] = CSP(words, placements)
+    csp.add_constraint(PlacementConstraint(words))
+    solution: Optional[Dict[str, Placement]] = csp.backtracking_search()
     if solution is None:
         print("No solution found!")
     else:
-        for word, grid_locations in solution.items():
-            for index, letter in enumerate(word):
-                (row, col) = (grid_locations[index].row, grid_locations[index].column)
+        for word, placement in solution.items():
+            for (row, col), letter in zip(placement.locations(), word):
                 grid[row][col] = letter
+        fill_blanks(grid)
         display_grid(grid)